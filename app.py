@@ -28,10 +28,26 @@ setup_mysql()
 # Import User model for login manager
 from models.user import User
 
+# The ingredient catalog is backfilled by `flask migrate`. The per-worker
+# ingredient indexes build on first use and the category classifier loads
+# in the background, so starting a worker makes no database round trips.
+
+# List recipe images once per worker; SIGUSR2 forces a reload
+from models.recipe_images import image_manifest
+image_manifest.load(os.path.join(app.static_folder, 'images', 'recipes'))
+image_manifest.install_signal_handler()
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.get_by_id(user_id)
 
+# Pick up recipe writes made by other workers, at most once per check interval
+from models.recipe_version import recipe_version, recipes_cli
+
+@app.before_request
+def check_recipe_version():
+    recipe_version.check()
+
 # Make datetime available in templates
 @app.context_processor
 def inject_now():
@@ -49,6 +65,15 @@ app.register_blueprint(recipe_bp, url_prefix='/recipe')
 app.register_blueprint(inventory_bp, url_prefix='/inventory')
 app.register_blueprint(meal_plan_bp, url_prefix='/meal-plan')
 
+# Register CLI commands
+from database.indexes import indexes_cli
+from database.migrations import migrate_command
+from models.match_matrix import digest_command
+app.cli.add_command(indexes_cli)
+app.cli.add_command(migrate_command)
+app.cli.add_command(recipes_cli)
+app.cli.add_command(digest_command)
+
 # Error handlers
 @app.errorhandler(404)
 def page_not_found(e):
@@ -80,22 +105,41 @@ def diagnose_mongo():
         logger.error(f"MongoDB diagnostic error: {e}")
         return {"status": "error", "message": str(e)}
 
+@app.route('/diagnose/cache')
+def diagnose_cache():
+    from database.cache import caches
+    return {
+        "status": "ok",
+        "caches": [cache.stats() for cache in caches.values()]
+    }
+
 @app.route('/diagnose/mysql')
 def diagnose_mysql():
-    from database.mysql_setup import get_connection
+    from database.mysql_setup import db_cursor
+    from database.schema import capabilities
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SHOW TABLES")
-        tables = [table[0] for table in cursor.fetchall()]
-        cursor.close()
+        with db_cursor() as cursor:
+            cursor.execute("SHOW TABLES")
+            tables = [table[0] for table in cursor.fetchall()]
         return {
             "status": "connected",
-            "tables": tables
+            "tables": tables,
+            "schema": capabilities().as_dict()
         }
     except Exception as e:
         logger.error(f"MySQL diagnostic error: {e}")
         return {"status": "error", "message": str(e)}
 
+@app.route('/diagnose/mysql/pool')
+def diagnose_mysql_pool():
+    from database.mysql_setup import pool_stats
+    return {
+        "status": "ok",
+        "pool": pool_stats()
+    }
+
 if __name__ == '__main__':
+    # The development server brings its own database up to date
+    from database.migrations import migrate
+    migrate()
     app.run(host='0.0.0.0', port=5000, debug=True)
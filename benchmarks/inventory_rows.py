@@ -0,0 +1,99 @@
+"""
+Benchmark inventory row materialization
+
+Compares the old path (dictionary cursor rows copied field by field into a
+plain class with a per-instance __dict__) with Inventory.from_row over
+tuple rows and the slotted Inventory class. Uses synthetic rows shaped like
+a large pantry, no database needed.
+
+Run from the project root:
+
+    python -m benchmarks.inventory_rows --rows 5000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from models.inventory import Inventory, INVENTORY_COLUMNS
+
+class LegacyInventory:
+    """Inventory as it was before __slots__"""
+
+    def __init__(self, id, user_id, ingredient_name, category, quantity, unit, expiry_date=None, added_date=None, ingredient_id=None):
+        self.id = id
+        self.user_id = user_id
+        self.ingredient_name = ingredient_name
+        self.category = category
+        self.quantity = quantity
+        self.unit = unit
+        self.expiry_date = expiry_date
+        self.added_date = added_date
+        self.ingredient_id = ingredient_id
+
+def legacy_items(dict_rows):
+    """The construction loop get_by_user_id used with a dictionary cursor"""
+    items = []
+    for item in dict_rows:
+        items.append(LegacyInventory(
+            id=item['id'],
+            user_id=item['user_id'],
+            ingredient_name=item['ingredient_name'],
+            category=item['category'],
+            quantity=item['quantity'],
+            unit=item['unit'],
+            expiry_date=item['expiry_date'],
+            added_date=item['added_date'],
+            ingredient_id=item.get('ingredient_id')
+        ))
+    return items
+
+def slotted_items(tuple_rows):
+    return [Inventory.from_row(row) for row in tuple_rows]
+
+def make_rows(count, seed=7):
+    rng = random.Random(seed)
+    today = date.today()
+    now = datetime.now()
+    return [
+        (
+            i, 1, f"ingredient {i:05d}", rng.choice(["produce", "dairy", "meat", "pantry"]),
+            float(rng.randint(1, 500)), rng.choice(["g", "ml", "piece"]),
+            today + timedelta(days=rng.randint(-5, 30)) if rng.random() < 0.7 else None,
+            now, None
+        )
+        for i in range(count)
+    ]
+
+def measure(label, build, rows, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        build(rows)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    # Only the objects built from the rows count; the rows are allocated beforehand
+    tracemalloc.start()
+    items = build(rows)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_row = allocated / len(rows)
+    print(f"{label:<40} {elapsed * 1000:9.2f} ms {len(rows) / elapsed:12,.0f} rows/s {per_row:8.1f} B/row")
+    return items
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    tuple_rows = make_rows(args.rows)
+    dict_rows = [dict(zip(INVENTORY_COLUMNS, row)) for row in tuple_rows]
+
+    print(f"{args.rows} inventory rows, average of {args.repeat} runs")
+    measure("dict rows -> plain class (before)", legacy_items, dict_rows, args.repeat)
+    measure("tuple rows -> Inventory.from_row", slotted_items, tuple_rows, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark recipe/pantry match scoring
+
+Compares the old per-recipe Python loop from Recipe.search_by_ingredients
+with the CookIndex and the sparse MatchMatrix, for a single pantry and for a
+batch of users. Uses a synthetic catalog, no database needed.
+
+Run from the project root:
+
+    python -m benchmarks.match_scoring --recipes 20000 --users 1000
+"""
+import argparse
+import random
+import time
+
+from models.cook_index import CookIndex
+from models.match_matrix import MatchMatrix
+
+def make_catalog(recipe_count, ingredient_count, seed=7):
+    rng = random.Random(seed)
+    names = [f"ingredient {i:05d}" for i in range(ingredient_count)]
+    recipes = [
+        {
+            "_id": f"{i:024x}",
+            "ingredients": [{"name": name} for name in rng.sample(names, rng.randint(4, 15))]
+        }
+        for i in range(recipe_count)
+    ]
+    return names, recipes
+
+def legacy_scores(recipes, pantry_names):
+    """The scoring loop Recipe.search_by_ingredients used before the index"""
+    pantry_names = [name.lower() for name in pantry_names]
+    scored = []
+
+    for recipe in recipes:
+        names = [ingredient["name"].lower() for ingredient in recipe["ingredients"]]
+        matching = sum(
+            1 for name in names
+            if any(name.startswith(pantry_name) for pantry_name in pantry_names)
+        )
+        if matching:
+            scored.append((recipe["_id"], matching / len(names)))
+
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return scored
+
+def timed(label, function, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<45} {elapsed * 1000:10.2f} ms")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=20000)
+    parser.add_argument("--ingredients", type=int, default=2000)
+    parser.add_argument("--pantry", type=int, default=200)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--legacy-users", type=int, default=2)
+    args = parser.parse_args()
+
+    names, recipes = make_catalog(args.recipes, args.ingredients)
+    rng = random.Random(11)
+    pantries = [rng.sample(names, args.pantry) for _ in range(args.users)]
+
+    print(f"{args.recipes} recipes, {args.ingredients} ingredients, {args.pantry}-item pantries\n")
+
+    index = CookIndex()
+    timed("build CookIndex", lambda: index.build_from_recipes(recipes))
+    matrix = timed("build MatchMatrix", lambda: MatchMatrix.from_cook_index(index))
+    print()
+
+    pantry = pantries[0]
+    timed("single pantry: legacy loop", lambda: legacy_scores(recipes, pantry))
+    timed("single pantry: CookIndex top 20", lambda: index.top_k(pantry, k=20), repeat=10)
+    timed("single pantry: MatchMatrix top 20", lambda: matrix.top_k(matrix.score(pantry), 20), repeat=10)
+    print()
+
+    timed(
+        f"{args.legacy_users} users: legacy loop",
+        lambda: [legacy_scores(recipes, p) for p in pantries[:args.legacy_users]]
+    )
+    timed(f"{args.users} users: CookIndex per user", lambda: [index.top_k(p, k=10) for p in pantries])
+    timed(
+        f"{args.users} users: MatchMatrix batched digest",
+        lambda: matrix.digest(dict(enumerate(pantries)), k=10)
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark the greedy week plan generator across catalog sizes
+
+Builds the generator from synthetic catalogs and fills a full week
+(every day x every meal type) for a pantry with some expiring items and a
+dietary preference. Reports build time, generation time and the number of
+ingredients left to buy. Uses synthetic data, no database needed.
+
+Run from the project root:
+
+    python -m benchmarks.plan_generator --sizes 1000 10000 50000
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from benchmarks.match_scoring import make_catalog
+from config import Config
+from models.plan_generator import PlanGenerator, DIETARY_KEYS
+
+def add_attributes(recipes, seed=7):
+    """Give synthetic recipes dietary flags and a meal type tag"""
+    rng = random.Random(seed)
+    meal_types = [meal_type for meal_type, _ in Config.MEAL_TYPES]
+
+    for recipe in recipes:
+        recipe["dietary_info"] = {key: rng.random() < 0.3 for key in DIETARY_KEYS}
+        recipe["tags"] = [rng.choice(meal_types)]
+
+    return recipes
+
+def random_grocery_count(recipes, pantry, slots, seed=7):
+    """Ingredients to buy for a random vegetarian week, as a baseline"""
+    rng = random.Random(seed)
+    allowed = [recipe for recipe in recipes if recipe["dietary_info"]["vegetarian"]]
+    have = set(pantry)
+    bought = set()
+
+    for recipe in rng.sample(allowed, min(len(slots), len(allowed))):
+        bought |= {ingredient["name"] for ingredient in recipe["ingredients"]} - have
+
+    return len(bought)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000, 50000])
+    parser.add_argument("--ingredients", type=int, default=2000)
+    parser.add_argument("--pantry", type=int, default=60)
+    parser.add_argument("--expiring", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    slots = [
+        (day_of_week, meal_type)
+        for day_of_week, _ in Config.DAYS_OF_WEEK
+        for meal_type, _ in Config.MEAL_TYPES
+    ]
+    today = date.today()
+
+    print(f"{len(slots)} slots per week, average of {args.repeat} generations")
+    print(f"{'recipes':>8} {'build ms':>10} {'generate ms':>12} {'filled':>7} {'to buy':>7} {'random':>7}")
+
+    for size in args.sizes:
+        names, recipes = make_catalog(size, args.ingredients)
+        add_attributes(recipes)
+
+        rng = random.Random(size)
+        pantry = rng.sample(names, args.pantry)
+        expiring = [(name, today + timedelta(days=rng.randint(0, 3))) for name in pantry[:args.expiring]]
+
+        generator = PlanGenerator()
+        start = time.perf_counter()
+        generator.build_from_recipes(recipes)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            plan = generator.generate(slots, pantry, expiring, {"vegetarian": True}, today=today)
+        generate_time = (time.perf_counter() - start) / args.repeat
+
+        print(
+            f"{size:>8} {build_time * 1000:>10.1f} {generate_time * 1000:>12.2f} "
+            f"{len(plan['items']):>7} {plan['grocery_count']:>7} "
+            f"{random_grocery_count(recipes, pantry, slots):>7}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,39 @@ class Config:
     MYSQL_USER = os.environ.get('MYSQL_USER', 'root')
     MYSQL_PASSWORD = os.environ.get('MYSQL_PASSWORD', '')
     MYSQL_DB = os.environ.get('MYSQL_DB', 'cookbookit')
+    MYSQL_POOL_SIZE = int(os.environ.get('MYSQL_POOL_SIZE', 10))
+    MYSQL_POOL_TIMEOUT = float(os.environ.get('MYSQL_POOL_TIMEOUT', 5))
     
     # Application settings
     RECIPES_PER_PAGE = 12
+    MEAL_PLAN_HISTORY_PER_PAGE = 8
+    GROCERY_RANGE_MAX_DAYS = 62
+    INVENTORY_BATCH_MAX_ROWS = int(os.environ.get('INVENTORY_BATCH_MAX_ROWS', 1000))
     INVENTORY_EXPIRY_WARNING_DAYS = 3
     
+    # Cache settings
+    RECIPE_CACHE_SIZE = int(os.environ.get('RECIPE_CACHE_SIZE', 2048))
+    RECIPE_CACHE_TTL = int(os.environ.get('RECIPE_CACHE_TTL', 3600))
+    SEARCH_CACHE_SIZE = int(os.environ.get('SEARCH_CACHE_SIZE', 512))
+    SEARCH_CACHE_TTL = int(os.environ.get('SEARCH_CACHE_TTL', 600))
+    PANTRY_CACHE_SIZE = int(os.environ.get('PANTRY_CACHE_SIZE', 1024))
+    PANTRY_CACHE_TTL = int(os.environ.get('PANTRY_CACHE_TTL', 300))
+    
+    # Seconds between checks of the recipe images directory for changes
+    IMAGE_MANIFEST_CHECK_INTERVAL = int(os.environ.get('IMAGE_MANIFEST_CHECK_INTERVAL', 30))
+    
+    # Seconds between checks of the shared recipes version for writes by other workers
+    RECIPE_VERSION_CHECK_INTERVAL = int(os.environ.get('RECIPE_VERSION_CHECK_INTERVAL', 15))
+    
+    # Seconds before a failed build of a per-worker ingredient index is retried
+    INDEX_BUILD_RETRY_INTERVAL = int(os.environ.get('INDEX_BUILD_RETRY_INTERVAL', 30))
+    
+    # Seconds between reloads of the learned ingredient categories
+    CATEGORY_CLASSIFIER_REFRESH_INTERVAL = int(os.environ.get('CATEGORY_CLASSIFIER_REFRESH_INTERVAL', 600))
+    
+    # Seconds a worker's first meal plan generation waits for the planner to load
+    PLAN_GENERATOR_BUILD_WAIT = float(os.environ.get('PLAN_GENERATOR_BUILD_WAIT', 10))
+    
     # Categories for ingredients
     INGREDIENT_CATEGORIES = [
         ('produce', 'Produce'),
@@ -0,0 +1,91 @@
+from collections import OrderedDict
+import threading
+import time
+
+class TTLCache:
+    """
+    Bounded in-process cache with LRU eviction and a per-entry time to live
+
+    Entries older than `ttl` seconds are treated as missing. When the cache is
+    full the least recently used entry is evicted. Hit, miss and eviction
+    counters are kept so the cache can be sized from real traffic.
+    """
+
+    def __init__(self, name, max_size=1024, ttl=300):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for a key or `default` when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entries if full"""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Drop a single entry"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return counters describing how well the cache is working"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+# Every cache created by the app, for the diagnostics endpoint
+caches = {}
+
+def create_cache(name, max_size, ttl):
+    """Create a named cache and register it for diagnostics"""
+    cache = TTLCache(name, max_size=max_size, ttl=ttl)
+    caches[name] = cache
+    return cache
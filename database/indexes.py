@@ -0,0 +1,261 @@
+from collections import namedtuple
+from flask.cli import AppGroup
+from pymongo.errors import OperationFailure
+import click
+import logging
+
+logger = logging.getLogger(__name__)
+
+MongoIndex = namedtuple("MongoIndex", ["collection", "name", "keys", "unique", "used_by"])
+MySQLIndex = namedtuple("MySQLIndex", ["table", "name", "columns", "used_by"])
+
+# Every index the models' queries rely on. Indexes are created at deploy time
+# by `flask migrate`, never from the request path; a new index also needs a
+# migration in database.migrations so it rolls out once.
+MONGO_INDEXES = [
+    # Named the way MongoDB names it by default, as the index predates the registry
+    MongoIndex(
+        "recipes", "name_text_description_text_ingredients.name_text",
+        [("name", "text"), ("description", "text"), ("ingredients.name", "text")],
+        False, "Recipe.search_by_name"
+    ),
+    MongoIndex(
+        "recipes", "ingredients.name_1",
+        [("ingredients.name", 1)],
+        False, "IngredientIndex.build, Ingredient.rebuild_catalog"
+    ),
+    MongoIndex(
+        "recipes", "difficulty_1__id_1",
+        [("difficulty", 1), ("_id", 1)],
+        False, "Recipe.get_page"
+    ),
+    MongoIndex(
+        "ingredients", "name_1",
+        [("name", 1)],
+        True, "Ingredient.get_by_name"
+    ),
+]
+
+MYSQL_INDEXES = [
+    MySQLIndex(
+        "inventory", "idx_inventory_user_name",
+        ["user_id", "ingredient_name"], "Inventory.get_by_user_id"
+    ),
+    MySQLIndex(
+        "inventory", "idx_inventory_user_expiry",
+        ["user_id", "expiry_date"], "Inventory.get_expiring_items"
+    ),
+    MySQLIndex(
+        "meal_plans", "idx_meal_plans_user_week",
+        ["user_id", "week_start_date"], "MealPlan.get_current_week, MealPlan.get_history"
+    ),
+    MySQLIndex(
+        "meal_plan_items", "idx_meal_plan_items_plan",
+        ["meal_plan_id", "day_of_week"], "MealPlan.get_by_id"
+    ),
+    MySQLIndex(
+        "completed_recipes", "idx_completed_recipes_user_date",
+        ["user_id", "completed_date"], "Recipe.get_completed_recipes"
+    ),
+]
+
+def _key_spec(keys):
+    """Comparable key spec; text fields are unordered within a text index"""
+    text = sorted(field for field, direction in keys if direction == "text")
+    other = [
+        (field, direction if isinstance(direction, str) else int(direction))
+        for field, direction in keys if direction != "text"
+    ]
+    return tuple(other) + tuple((field, "text") for field in text)
+
+def _mongo_indexes(db, collection):
+    """Key specs of a collection's existing indexes, keyed by index name"""
+    indexes = {}
+    for name, info in db[collection].index_information().items():
+        keys = [(field, direction) for field, direction in info["key"] if field not in ("_fts", "_ftsx")]
+        # Text indexes report their fields as weights rather than keys
+        keys += [(field, "text") for field in info.get("weights", {})]
+        indexes[name] = _key_spec(keys)
+    return indexes
+
+def _mongo_index_exists(index, existing):
+    """Whether an index is present under its name or as an equivalent key spec"""
+    return index.name in existing or _key_spec(index.keys) in existing.values()
+
+def _mysql_index_names(cursor, table):
+    cursor.execute(
+        """
+        SELECT DISTINCT index_name FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+        """,
+        (table,)
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+class IndexCreationError(Exception):
+    """Raised when registered indexes could not be created"""
+
+def ensure_mongo_indexes(raise_errors=False):
+    """
+    Create any missing MongoDB indexes and return their names
+
+    Args:
+        raise_errors (bool): Raise IndexCreationError after trying every index
+            if any failed, so a migration is not recorded; otherwise failures
+            are only logged
+
+    Returns:
+        list: Names of the created indexes
+    """
+    from database.mongo_setup import mongo_db
+
+    created = []
+    failed = []
+    for index in MONGO_INDEXES:
+        if _mongo_index_exists(index, _mongo_indexes(mongo_db, index.collection)):
+            continue
+
+        # One conflicting index must not stop the others from being created
+        try:
+            mongo_db[index.collection].create_index(index.keys, name=index.name, unique=index.unique)
+        except OperationFailure as e:
+            logger.error(f"Could not create MongoDB index {index.collection}.{index.name}: {e}")
+            failed.append(f"{index.collection}.{index.name}")
+            continue
+
+        logger.info(f"Created MongoDB index {index.collection}.{index.name}")
+        created.append(f"{index.collection}.{index.name}")
+
+    if failed and raise_errors:
+        raise IndexCreationError(f"Could not create MongoDB indexes: {', '.join(failed)}")
+
+    return created
+
+def create_mysql_indexes(cursor, indexes=None):
+    """Create any missing MySQL indexes with the given cursor and return their names"""
+    created = []
+    for index in indexes or MYSQL_INDEXES:
+        if index.name not in _mysql_index_names(cursor, index.table):
+            columns = ", ".join(index.columns)
+            cursor.execute(f"CREATE INDEX {index.name} ON {index.table} ({columns})")
+            logger.info(f"Created MySQL index {index.table}.{index.name}")
+            created.append(f"{index.table}.{index.name}")
+
+    return created
+
+def ensure_mysql_indexes():
+    """Create any missing MySQL indexes and return their names"""
+    from database.mysql_setup import db_cursor
+
+    with db_cursor() as cursor:
+        return create_mysql_indexes(cursor)
+
+def ensure_indexes():
+    """Create every registered index that does not exist yet"""
+    return ensure_mongo_indexes() + ensure_mysql_indexes()
+
+def _mongo_report():
+    from database.mongo_setup import mongo_db
+
+    missing = []
+    unused = []
+    unregistered = []
+
+    for collection in sorted({index.collection for index in MONGO_INDEXES}):
+        registered = [index for index in MONGO_INDEXES if index.collection == collection]
+        existing = _mongo_indexes(mongo_db, collection)
+        registered_specs = {_key_spec(index.keys) for index in registered}
+        registered_names = {index.name for index in registered}
+
+        missing.extend(
+            f"{collection}.{index.name}" for index in registered
+            if not _mongo_index_exists(index, existing)
+        )
+        unregistered.extend(
+            f"{collection}.{name}" for name, spec in sorted(existing.items())
+            if name != "_id_" and name not in registered_names and spec not in registered_specs
+        )
+
+        # Usage counters are kept since the last mongod restart
+        for stats in mongo_db[collection].aggregate([{"$indexStats": {}}]):
+            if stats["name"] != "_id_" and stats["accesses"]["ops"] == 0:
+                unused.append(f"{collection}.{stats['name']}")
+
+    return {"missing": missing, "unused": unused, "unregistered": unregistered}
+
+def _mysql_report():
+    from database.mysql_setup import db_cursor
+
+    missing = []
+    unused = []
+    unregistered = []
+
+    with db_cursor() as cursor:
+        for table in sorted({index.table for index in MYSQL_INDEXES}):
+            registered = {index.name for index in MYSQL_INDEXES if index.table == table}
+            existing = _mysql_index_names(cursor, table)
+
+            missing.extend(f"{table}.{name}" for name in sorted(registered - existing))
+
+            # Foreign key columns get an index named after the column automatically
+            cursor.execute(
+                """
+                SELECT constraint_name FROM information_schema.table_constraints
+                WHERE table_schema = DATABASE() AND table_name = %s
+                """,
+                (table,)
+            )
+            constraints = {row[0] for row in cursor.fetchall()}
+            cursor.execute(
+                """
+                SELECT column_name FROM information_schema.key_column_usage
+                WHERE table_schema = DATABASE() AND table_name = %s
+                AND referenced_table_name IS NOT NULL
+                """,
+                (table,)
+            )
+            foreign_keys = {row[0] for row in cursor.fetchall()}
+            unregistered.extend(
+                f"{table}.{name}" for name in sorted(existing - registered - constraints - foreign_keys - {"PRIMARY"})
+            )
+
+        # Needs performance_schema; counters are kept since the last server restart
+        try:
+            cursor.execute(
+                """
+                SELECT object_name, index_name
+                FROM performance_schema.table_io_waits_summary_by_index_usage
+                WHERE object_schema = DATABASE() AND index_name IS NOT NULL
+                AND index_name <> 'PRIMARY' AND count_star = 0
+                ORDER BY object_name, index_name
+                """
+            )
+            unused = [f"{table}.{name}" for table, name in cursor.fetchall()]
+        except Exception as e:
+            logger.warning(f"Could not read MySQL index usage: {e}")
+
+    return {"missing": missing, "unused": unused, "unregistered": unregistered}
+
+def index_report():
+    """Report missing, unused and unregistered indexes in both stores"""
+    return {"mongo": _mongo_report(), "mysql": _mysql_report()}
+
+indexes_cli = AppGroup("indexes", help="Create and check database indexes.")
+
+@indexes_cli.command("ensure")
+def ensure_command():
+    """Create every registered index that is missing."""
+    created = ensure_indexes()
+    if created:
+        for name in created:
+            click.echo(f"created {name}")
+    else:
+        click.echo("All indexes present")
+
+@indexes_cli.command("report")
+def report_command():
+    """List missing, unused and unregistered indexes."""
+    for store, report in index_report().items():
+        for kind in ("missing", "unused", "unregistered"):
+            for name in report[kind]:
+                click.echo(f"{store:<6} {kind:<13} {name}")
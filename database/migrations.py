@@ -0,0 +1,295 @@
+from collections import namedtuple
+from flask.cli import with_appcontext
+from mysql.connector import errorcode
+import mysql.connector
+import click
+import logging
+from database.indexes import create_mysql_indexes, ensure_mongo_indexes
+
+logger = logging.getLogger(__name__)
+
+Migration = namedtuple("Migration", ["version", "name", "apply"])
+
+# Named lock so only one process applies migrations at a time
+MIGRATION_LOCK = "cookbookit_migrations"
+MIGRATION_LOCK_TIMEOUT = 60
+
+def _create_tables(cursor):
+    """Create the application tables if they don't exist"""
+    # Create users table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(64) NOT NULL UNIQUE,
+            email VARCHAR(120) NOT NULL UNIQUE,
+            password VARCHAR(256) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Create inventory table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS inventory (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            ingredient_name VARCHAR(100) NOT NULL,
+            category VARCHAR(50) NOT NULL,
+            quantity FLOAT NOT NULL,
+            unit VARCHAR(20) NOT NULL,
+            expiry_date DATE,
+            added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ingredient_id VARCHAR(50),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
+    
+    # Create meal_plans table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS meal_plans (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            week_start_date DATE NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
+    
+    # Create meal_plan_items table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS meal_plan_items (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            meal_plan_id INT NOT NULL,
+            recipe_id VARCHAR(50) NOT NULL,
+            day_of_week INT NOT NULL,
+            meal_type VARCHAR(20) NOT NULL,
+            FOREIGN KEY (meal_plan_id) REFERENCES meal_plans(id) ON DELETE CASCADE
+        )
+    """)
+    
+    # Create completed_recipes table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS completed_recipes (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            recipe_id VARCHAR(50) NOT NULL,
+            completed_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            servings_made INT NOT NULL DEFAULT 1,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
+    
+    # Create user_preferences table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_preferences (
+            user_id INT PRIMARY KEY,
+            vegetarian BOOLEAN DEFAULT FALSE,
+            vegan BOOLEAN DEFAULT FALSE,
+            gluten_free BOOLEAN DEFAULT FALSE,
+            dairy_free BOOLEAN DEFAULT FALSE,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
+
+def _add_inventory_ingredient_id(cursor):
+    """Add inventory.ingredient_id to tables created before it existed"""
+    cursor.execute(
+        """
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = 'inventory'
+        AND column_name = 'ingredient_id'
+        """
+    )
+    if not cursor.fetchall():
+        cursor.execute("ALTER TABLE inventory ADD COLUMN ingredient_id VARCHAR(50)")
+
+def _create_registered_indexes(cursor):
+    """Create the indexes in database.indexes for both stores"""
+    create_mysql_indexes(cursor)
+    ensure_mongo_indexes(raise_errors=True)
+
+def _create_pantry_versions(cursor):
+    """Per-user counter bumped by every inventory write, for pantry caches"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pantry_versions (
+            user_id INT PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
+
+def _create_meal_plan_grocery(cursor):
+    """Materialized grocery requirement per meal plan, in base units"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS meal_plan_grocery (
+            meal_plan_id INT NOT NULL,
+            ingredient_name VARCHAR(100) NOT NULL,
+            dimension VARCHAR(50) NOT NULL,
+            unit VARCHAR(50) NOT NULL,
+            amount DOUBLE NOT NULL,
+            PRIMARY KEY (meal_plan_id, ingredient_name, dimension),
+            FOREIGN KEY (meal_plan_id) REFERENCES meal_plans(id) ON DELETE CASCADE
+        )
+    """)
+    
+    # Plans start out unbuilt and are materialized on their first grocery list view
+    cursor.execute(
+        """
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = 'meal_plans'
+        AND column_name = 'grocery_ready'
+        """
+    )
+    if not cursor.fetchall():
+        cursor.execute("ALTER TABLE meal_plans ADD COLUMN grocery_ready BOOLEAN NOT NULL DEFAULT FALSE")
+
+def _backfill_ingredient_catalog(cursor):
+    """Fill the ingredient catalog from existing recipes, once its unique index exists"""
+    from models.ingredient import Ingredient
+
+    # Upserting by name is only safe with the unique index in place
+    ensure_mongo_indexes(raise_errors=True)
+
+    Ingredient.rebuild_catalog(raise_errors=True)
+
+def _rekey_meal_plan_grocery(cursor):
+    """
+    Key grocery lines by a hash of ingredient name and dimension
+    
+    Recipe ingredient names and units have no length limit, so the text
+    columns hold a truncated copy for display and the full values only go
+    into the key. `uses` counts the recipe ingredients behind a line, so a
+    line is deleted when its last recipe leaves the plan rather than when
+    its amount reaches zero. The table only holds derived data, so it is
+    recreated and every plan is rebuilt on its next grocery list view.
+    """
+    cursor.execute("DROP TABLE IF EXISTS meal_plan_grocery")
+    cursor.execute("""
+        CREATE TABLE meal_plan_grocery (
+            meal_plan_id INT NOT NULL,
+            line_key BINARY(20) NOT NULL,
+            ingredient_name VARCHAR(255) NOT NULL,
+            dimension VARCHAR(255) NOT NULL,
+            unit VARCHAR(255) NOT NULL,
+            amount DOUBLE NOT NULL,
+            uses INT NOT NULL,
+            PRIMARY KEY (meal_plan_id, line_key),
+            FOREIGN KEY (meal_plan_id) REFERENCES meal_plans(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("UPDATE meal_plans SET grocery_ready = FALSE WHERE grocery_ready")
+
+def _retry_mongo_indexes(cursor):
+    """Create MongoDB indexes that failed while migration 3 only logged errors"""
+    ensure_mongo_indexes(raise_errors=True)
+
+# Every schema change, in order. Migrations must be safe to re-run against a
+# database that already has the change, since databases created before the
+# versions table existed start at version 0.
+MIGRATIONS = [
+    Migration(1, "create tables", _create_tables),
+    Migration(2, "add inventory.ingredient_id", _add_inventory_ingredient_id),
+    Migration(3, "create registered indexes", _create_registered_indexes),
+    Migration(4, "create pantry_versions", _create_pantry_versions),
+    Migration(5, "create meal_plan_grocery", _create_meal_plan_grocery),
+    Migration(6, "backfill ingredient catalog", _backfill_ingredient_catalog),
+    Migration(7, "rekey meal_plan_grocery by hash", _rekey_meal_plan_grocery),
+    Migration(8, "retry MongoDB indexes", _retry_mongo_indexes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+def current_version(cursor):
+    """
+    Return the version of the connected database with one query
+    
+    Returns:
+        int: Highest applied migration, or 0 if the database was never migrated
+    """
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_migrations")
+        return cursor.fetchall()[0][0] or 0
+    except mysql.connector.Error as e:
+        if e.errno == errorcode.ER_NO_SUCH_TABLE:
+            return 0
+        raise
+
+def _applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def migrate():
+    """
+    Apply every pending migration and record it in schema_migrations
+    
+    Returns:
+        list: Migrations that were applied
+    """
+    from database.mysql_setup import connection, db_cursor
+    from database.schema import load_capabilities
+    
+    applied = []
+    
+    with connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK, MIGRATION_LOCK_TIMEOUT))
+            if cursor.fetchall()[0][0] != 1:
+                raise RuntimeError(f"Timed out waiting for the {MIGRATION_LOCK} lock")
+            
+            try:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version INT PRIMARY KEY,
+                        name VARCHAR(100) NOT NULL,
+                        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                
+                done = _applied_versions(cursor)
+                
+                for migration in MIGRATIONS:
+                    if migration.version in done:
+                        continue
+                    
+                    logger.info(f"Applying migration {migration.version}: {migration.name}")
+                    migration.apply(cursor)
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                        (migration.version, migration.name)
+                    )
+                    conn.commit()
+                    applied.append(migration)
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+                cursor.fetchall()
+        finally:
+            cursor.close()
+    
+    # Refresh this process's view of the schema
+    with db_cursor() as cursor:
+        load_capabilities(cursor)
+    
+    return applied
+
+@click.command("migrate")
+@click.option("--status", is_flag=True, help="List applied and pending migrations without applying them.")
+@with_appcontext
+def migrate_command(status):
+    """Apply pending database migrations."""
+    if status:
+        from database.mysql_setup import db_cursor
+        
+        with db_cursor() as cursor:
+            version = current_version(cursor)
+            done = _applied_versions(cursor) if version else set()
+        
+        for migration in MIGRATIONS:
+            state = "applied" if migration.version in done else "pending"
+            click.echo(f"{migration.version:>4} {state:<8} {migration.name}")
+        return
+    
+    applied = migrate()
+    if applied:
+        for migration in applied:
+            click.echo(f"applied {migration.version}: {migration.name}")
+    else:
+        click.echo(f"Database is at version {LATEST_VERSION}")
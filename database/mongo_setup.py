@@ -13,11 +13,9 @@ def setup_mongo():
     global mongo_db
     
     try:
-        # Connect to MongoDB
-        client = pymongo.MongoClient(Config.MONGO_URI)
-        
-        # Check connection
-        client.admin.command('ping')
+        # Connect to MongoDB lazily; the first query opens the connection,
+        # so worker boot does not wait on a round trip
+        client = pymongo.MongoClient(Config.MONGO_URI, connect=False)
         
         # Get database name from connection string
         db_name = Config.MONGO_URI.split('/')[-1]
@@ -25,17 +23,9 @@ def setup_mongo():
         # Set database
         mongo_db = client[db_name]
         
-        logger.info(f"Connected to MongoDB: {db_name}")
+        logger.info(f"Using MongoDB: {db_name}")
         
-        # Ensure text indexes exist for search
-        if "name_text" not in mongo_db.recipes.index_information():
-            mongo_db.recipes.create_index([
-                ("name", "text"), 
-                ("description", "text"),
-                ("ingredients.name", "text")
-            ])
-            logger.info("Created text indexes for recipe search")
-            
+        # Indexes are created at deploy time by `flask migrate`
         return mongo_db
     except Exception as e:
         logger.error(f"MongoDB connection error: {e}")
@@ -1,120 +1,162 @@
 import os
+import threading
+import time
 import mysql.connector
+import mysql.connector.pooling
 import logging
+from contextlib import contextmanager
 from config import Config
+from database.schema import load_capabilities
+from database.migrations import LATEST_VERSION
 
 logger = logging.getLogger(__name__)
 
 # Connection pool
 mysql_pool = None
 
+# Limits checkouts to the pool size so callers wait instead of failing
+_pool_slots = None
+
+# Pool utilization counters, guarded by _stats_lock
+_stats_lock = threading.Lock()
+_pool_stats = {
+    "in_use": 0,
+    "waiters": 0,
+    "checkouts": 0,
+    "timeouts": 0,
+    "total_wait": 0.0,
+    "max_wait": 0.0
+}
+
+class PoolExhaustedError(Exception):
+    """Raised when no pooled connection frees up within MYSQL_POOL_TIMEOUT"""
+
 def setup_mysql():
     """Setup MySQL connection pool"""
-    global mysql_pool
+    global mysql_pool, _pool_slots
     
     try:
         # Create connection pool
         mysql_pool = mysql.connector.pooling.MySQLConnectionPool(
             pool_name="cookbookit_pool",
-            pool_size=5,
+            pool_size=Config.MYSQL_POOL_SIZE,
             host=Config.MYSQL_HOST,
             user=Config.MYSQL_USER,
             password=Config.MYSQL_PASSWORD,
             database=Config.MYSQL_DB
         )
         
-        logger.info(f"Connected to MySQL: {Config.MYSQL_DB}")
-        
-        # Initialize database tables if they don't exist
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Create users table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(64) NOT NULL UNIQUE,
-                email VARCHAR(120) NOT NULL UNIQUE,
-                password VARCHAR(256) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create inventory table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS inventory (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                ingredient_name VARCHAR(100) NOT NULL,
-                category VARCHAR(50) NOT NULL,
-                quantity FLOAT NOT NULL,
-                unit VARCHAR(20) NOT NULL,
-                expiry_date DATE,
-                added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ingredient_id VARCHAR(50),
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        """)
-        
-        # Create meal_plans table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS meal_plans (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                week_start_date DATE NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        """)
+        _pool_slots = threading.BoundedSemaphore(Config.MYSQL_POOL_SIZE)
         
-        # Create meal_plan_items table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS meal_plan_items (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                meal_plan_id INT NOT NULL,
-                recipe_id VARCHAR(50) NOT NULL,
-                day_of_week INT NOT NULL,
-                meal_type VARCHAR(20) NOT NULL,
-                FOREIGN KEY (meal_plan_id) REFERENCES meal_plans(id) ON DELETE CASCADE
-            )
-        """)
+        logger.info(f"Connected to MySQL: {Config.MYSQL_DB}")
         
-        # Create completed_recipes table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS completed_recipes (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                recipe_id VARCHAR(50) NOT NULL,
-                completed_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                servings_made INT NOT NULL DEFAULT 1,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        """)
+        # Introspect the schema once per worker so writes never need SHOW COLUMNS.
+        # Tables and indexes are created by `flask migrate`, not at worker boot.
+        with db_cursor() as cursor:
+            schema = load_capabilities(cursor)
         
-        # Create user_preferences table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS user_preferences (
-                user_id INT PRIMARY KEY,
-                vegetarian BOOLEAN DEFAULT FALSE,
-                vegan BOOLEAN DEFAULT FALSE,
-                gluten_free BOOLEAN DEFAULT FALSE,
-                dairy_free BOOLEAN DEFAULT FALSE,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        if schema.version < LATEST_VERSION:
+            logger.error(
+                f"MySQL schema is at version {schema.version}, expected {LATEST_VERSION}; "
+                f"run `flask migrate`"
             )
-        """)
-        
-        cursor.close()
-        conn.close()
-        
-        logger.info("MySQL tables initialized")
+        else:
+            logger.info(f"MySQL schema at version {schema.version}")
     except Exception as e:
         logger.error(f"MySQL setup error: {e}")
         raise
 
-def get_connection():
-    """Get a connection from the pool"""
-    global mysql_pool
-    
+def _checkout():
+    """Take a connection from the pool, waiting up to MYSQL_POOL_TIMEOUT seconds"""
     if mysql_pool is None:
         setup_mysql()
-        
-    return mysql_pool.get_connection()
+    
+    with _stats_lock:
+        _pool_stats["waiters"] += 1
+    
+    started = time.monotonic()
+    acquired = _pool_slots.acquire(timeout=Config.MYSQL_POOL_TIMEOUT)
+    waited = time.monotonic() - started
+    
+    with _stats_lock:
+        _pool_stats["waiters"] -= 1
+        _pool_stats["total_wait"] += waited
+        _pool_stats["max_wait"] = max(_pool_stats["max_wait"], waited)
+        if not acquired:
+            _pool_stats["timeouts"] += 1
+    
+    if not acquired:
+        raise PoolExhaustedError(
+            f"No MySQL connection available after {Config.MYSQL_POOL_TIMEOUT}s"
+        )
+    
+    try:
+        conn = mysql_pool.get_connection()
+    except Exception:
+        _pool_slots.release()
+        raise
+    
+    with _stats_lock:
+        _pool_stats["in_use"] += 1
+        _pool_stats["checkouts"] += 1
+    
+    return conn
+
+def _release(conn):
+    """Return a connection to the pool"""
+    try:
+        conn.close()
+    finally:
+        with _stats_lock:
+            _pool_stats["in_use"] -= 1
+        _pool_slots.release()
+
+@contextmanager
+def connection():
+    """Check out a pooled connection that is always returned to the pool"""
+    conn = _checkout()
+    try:
+        yield conn
+    finally:
+        _release(conn)
+
+@contextmanager
+def db_cursor(dictionary=False):
+    """Cursor on a pooled connection for reads; the connection is always returned"""
+    with connection() as conn:
+        cursor = conn.cursor(dictionary=dictionary)
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+@contextmanager
+def transaction(dictionary=False):
+    """
+    Cursor inside a transaction on a pooled connection
+    
+    Commits when the block finishes, rolls back and re-raises on error, and
+    always returns the connection to the pool.
+    """
+    with connection() as conn:
+        cursor = conn.cursor(dictionary=dictionary)
+        try:
+            yield cursor
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+def pool_stats():
+    """Return pool utilization counters for diagnostics"""
+    with _stats_lock:
+        stats = dict(_pool_stats)
+    
+    stats["pool_size"] = Config.MYSQL_POOL_SIZE
+    stats["checkout_timeout"] = Config.MYSQL_POOL_TIMEOUT
+    stats["average_wait"] = round(stats["total_wait"] / stats["checkouts"], 6) if stats["checkouts"] else 0.0
+    stats["total_wait"] = round(stats["total_wait"], 6)
+    stats["max_wait"] = round(stats["max_wait"], 6)
+    return stats
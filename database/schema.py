@@ -0,0 +1,94 @@
+import time
+import logging
+from database.migrations import current_version, LATEST_VERSION
+
+logger = logging.getLogger(__name__)
+
+class SchemaCapabilities:
+    """Columns of the application tables, introspected once per worker"""
+
+    def __init__(self, columns, version):
+        self.columns = columns
+        self.version = version
+
+    def has_column(self, table, column):
+        return column in self.columns.get(table, ())
+
+    def require(self, table, column):
+        """Raise if a column the models rely on is missing"""
+        if not self.has_column(table, column):
+            raise RuntimeError(
+                f"Schema version {self.version} is missing {table}.{column}; "
+                f"run `flask migrate` to upgrade to version {LATEST_VERSION}"
+            )
+
+    def as_dict(self):
+        return {
+            "version": self.version,
+            "latest_version": LATEST_VERSION,
+            "tables": {table: sorted(columns) for table, columns in self.columns.items()}
+        }
+
+# Capabilities of the connected database, set by load_capabilities
+_capabilities = None
+
+# Seconds between re-introspections when a required column is missing
+RECHECK_INTERVAL = 5
+_checked_at = None
+
+def _introspect(cursor):
+    """Read every column of the current database with one query"""
+    cursor.execute(
+        """
+        SELECT table_name, column_name FROM information_schema.columns
+        WHERE table_schema = DATABASE()
+        """
+    )
+
+    columns = {}
+    for table, column in cursor.fetchall():
+        columns.setdefault(table, set()).add(column)
+
+    return columns
+
+def load_capabilities(cursor):
+    """
+    Introspect the schema and cache the result for this process
+    
+    This only reads; schema changes are applied by `flask migrate`.
+    """
+    global _capabilities, _checked_at
+    
+    _capabilities = SchemaCapabilities(_introspect(cursor), current_version(cursor))
+    _checked_at = time.monotonic()
+    return _capabilities
+
+def capabilities():
+    """Return the cached schema capabilities, introspecting if needed"""
+    if _capabilities is None:
+        from database.mysql_setup import db_cursor
+
+        with db_cursor() as cursor:
+            load_capabilities(cursor)
+
+    return _capabilities
+
+def require_column(table, column):
+    """
+    Raise if a column the models rely on is missing
+
+    A miss re-introspects the schema, at most once every RECHECK_INTERVAL
+    seconds, so workers started before `flask migrate` pick up the new
+    columns without a restart.
+    """
+    schema = capabilities()
+    if schema.has_column(table, column):
+        return
+
+    if _checked_at is None or time.monotonic() - _checked_at >= RECHECK_INTERVAL:
+        from database.mysql_setup import db_cursor
+
+        with db_cursor() as cursor:
+            schema = load_capabilities(cursor)
+
+    schema.require(table, column)
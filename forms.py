@@ -1,5 +1,6 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, BooleanField, FloatField, SelectField, DateField, HiddenField
+from flask_wtf.file import FileField
+from wtforms import StringField, PasswordField, BooleanField, FloatField, SelectField, DateField, HiddenField, TextAreaField
 from wtforms.validators import DataRequired, Email, EqualTo, Length, Optional
 from config import Config
 from datetime import datetime, timedelta
@@ -22,6 +23,10 @@ class InventoryForm(FlaskForm):
     unit = SelectField('Unit', choices=Config.INGREDIENT_UNITS, validators=[DataRequired()])
     expiry_date = DateField('Expiry Date', format='%Y-%m-%d', validators=[Optional()])
 
+class InventoryImportForm(FlaskForm):
+    csv_file = FileField('CSV File')
+    csv_text = TextAreaField('Or paste CSV')
+
 class MealPlanForm(FlaskForm):
     recipe_id = HiddenField('Recipe ID', validators=[DataRequired()])
     day_of_week = SelectField('Day', choices=Config.DAYS_OF_WEEK, validators=[DataRequired()])
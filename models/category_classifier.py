@@ -0,0 +1,215 @@
+import threading
+import time
+from collections import Counter
+from config import Config
+from models.ingredient import CATEGORY_KEYWORDS, normalize_ingredient_name
+import logging
+
+logger = logging.getLogger(__name__)
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over the category keyword table
+
+    Finds every keyword occurring anywhere in a name in one pass over its
+    characters. Each state stores the best (earliest listed) category among
+    the keywords ending there, so a scan returns the same category as
+    checking the categories in order with substring tests.
+    """
+
+    def __init__(self, keywords_by_category):
+        self.categories = list(keywords_by_category)
+        self._goto = [{}]
+        self._fail = [0]
+        self._rank = [len(self.categories)]
+
+        for rank, keywords in enumerate(keywords_by_category.values()):
+            for keyword in keywords:
+                self._insert(keyword.lower(), rank)
+
+        self._link()
+
+    def _insert(self, keyword, rank):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._rank.append(len(self.categories))
+                self._goto[state][char] = next_state
+            state = next_state
+
+        self._rank[state] = min(self._rank[state], rank)
+
+    def _link(self):
+        """Set failure links breadth first and fold in the ranks they reach"""
+        queue = list(self._goto[0].values())
+
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._rank[next_state] = min(self._rank[next_state], self._rank[self._fail[next_state]])
+                queue.append(next_state)
+
+    def match(self, text):
+        """
+        Return the first category with a keyword in `text`
+
+        Returns:
+            str: Category, or None if no keyword occurs
+        """
+        goto = self._goto
+        fail = self._fail
+        ranks = self._rank
+        best = len(self.categories)
+        state = 0
+
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            if ranks[state] < best:
+                best = ranks[state]
+                if best == 0:
+                    break
+
+        return self.categories[best] if best < len(self.categories) else None
+
+class CategoryClassifier:
+    """
+    Per-worker ingredient category classifier
+
+    Names are classified from a learned name -> category map, built from the
+    categories users pick in their inventory and from the ingredient catalog,
+    falling back to the keyword automaton. Classifying never touches a
+    database: the learned map is refreshed in a background thread at most
+    once every `refresh_interval` seconds.
+    """
+
+    def __init__(self, keywords_by_category, refresh_interval=600):
+        self.automaton = KeywordAutomaton(keywords_by_category)
+        self.refresh_interval = refresh_interval
+        self._learned = {}
+        self._refreshed_at = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """Read the learned map from the catalog and every user's inventory"""
+        from database.mongo_setup import mongo_db
+        from database.mysql_setup import db_cursor
+
+        learned = {}
+        for ingredient in mongo_db.ingredients.find({}, {"name": 1, "category": 1}):
+            if ingredient.get("category"):
+                learned[ingredient["name"]] = ingredient["category"]
+
+        # The category users pick most often for a name wins over the catalog
+        with db_cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT LOWER(ingredient_name), category, COUNT(*) FROM inventory
+                GROUP BY LOWER(ingredient_name), category
+                """
+            )
+            votes = {}
+            for name, category, count in cursor.fetchall():
+                votes.setdefault(normalize_ingredient_name(name), Counter())[category] += count
+
+        for name, counts in votes.items():
+            learned[name] = counts.most_common(1)[0][0]
+
+        return learned
+
+    def refresh(self):
+        """Reload the learned map; on error the previous map is kept"""
+        try:
+            learned = self._load()
+        except Exception as e:
+            logger.error(f"Error refreshing category classifier: {e}")
+            learned = None
+
+        with self._lock:
+            if learned is not None:
+                self._learned = learned
+            self._refreshed_at = time.monotonic()
+            self._refreshing = False
+
+        if learned is not None:
+            logger.info(f"Category classifier learned {len(learned)} names")
+
+    def _refresh_if_stale(self):
+        """Start a background refresh when the learned map is older than the interval"""
+        if self._refreshed_at is not None and time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        threading.Thread(target=self.refresh, name="category-classifier-refresh", daemon=True).start()
+
+    def learn(self, ingredient_name, category):
+        """Remember a category picked for a name until the next refresh"""
+        name = normalize_ingredient_name(ingredient_name)
+        if name and category:
+            self._learned[name] = category
+
+    def guess(self, ingredient_name):
+        """Suggest a category from keywords in the name alone"""
+        return self.automaton.match(normalize_ingredient_name(ingredient_name)) or 'other'
+
+    def classify(self, ingredient_name):
+        """
+        Suggest a category for an ingredient
+
+        Args:
+            ingredient_name (str): Ingredient name
+
+        Returns:
+            str: Category ID, 'other' if nothing matches
+        """
+        self._refresh_if_stale()
+
+        name = normalize_ingredient_name(ingredient_name)
+        return self._learned.get(name) or self.automaton.match(name) or 'other'
+
+    def classify_many(self, ingredient_names):
+        """
+        Suggest categories for many ingredients, for bulk imports
+
+        Args:
+            ingredient_names (iterable): Ingredient names
+
+        Returns:
+            list: Category IDs in input order
+        """
+        self._refresh_if_stale()
+
+        learned = self._learned
+        match = self.automaton.match
+        categories = []
+        cache = {}
+
+        for ingredient_name in ingredient_names:
+            name = normalize_ingredient_name(ingredient_name)
+            category = cache.get(name)
+            if category is None:
+                category = cache[name] = learned.get(name) or match(name) or 'other'
+            categories.append(category)
+
+        return categories
+
+# Shared classifier for this worker process
+category_classifier = CategoryClassifier(
+    CATEGORY_KEYWORDS,
+    refresh_interval=Config.CATEGORY_CLASSIFIER_REFRESH_INTERVAL
+)
@@ -0,0 +1,239 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+import heapq
+import threading
+import logging
+from models.ingredient import normalize_ingredient_name
+from models.lazy_build import LazyBuild
+
+logger = logging.getLogger(__name__)
+
+def _resolve_names(vocabulary, ingredient_ids, names):
+    """Ids of every name in the sorted `vocabulary` that one of `names` prefixes"""
+    resolved = set()
+
+    for name in names:
+        prefix = normalize_ingredient_name(name)
+        if not prefix:
+            continue
+
+        position = bisect_left(vocabulary, prefix)
+        while position < len(vocabulary) and vocabulary[position].startswith(prefix):
+            resolved.add(ingredient_ids[vocabulary[position]])
+            position += 1
+
+    return resolved
+
+class CookIndexSnapshot:
+    """
+    Point-in-time view of a CookIndex for building matrices over it
+
+    The lists are copied and the ingredient arrays and vocabulary are never
+    modified in place, so later writes and rebuilds of the index do not
+    change the snapshot. Ingredients added after it was taken do not resolve.
+    """
+
+    def __init__(self, recipe_ids, recipe_ingredients, vocabulary, ingredient_ids):
+        self.recipe_ids = recipe_ids
+        self.recipe_ingredients = recipe_ingredients
+        self.ingredient_count = len(ingredient_ids)
+        self._vocabulary = vocabulary
+        self._ingredient_ids = ingredient_ids
+
+    def resolve(self, names):
+        """Map ingredient names to ids, as CookIndex.resolve does"""
+        return _resolve_names(self._vocabulary, self._ingredient_ids, names)
+
+class CookIndex(LazyBuild):
+    """
+    In-memory inverted index from canonical ingredient to recipes
+
+    Every canonical ingredient name gets an integer id. Each recipe is stored
+    as a sorted array of its ingredient ids and each ingredient keeps a
+    posting set of recipe positions. Scoring a pantry counts, over the
+    postings of its ingredients, how many of each recipe's ingredients it
+    covers, so the cost follows the pantry's postings rather than the size of
+    the vocabulary.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._ingredient_ids = {}
+        self._vocabulary = []
+        self._postings = []
+        self._recipe_ids = []
+        self._recipe_positions = {}
+        self._recipe_ingredients = []
+
+    def build(self):
+        """Load the ingredient names of every recipe from MongoDB"""
+        from database.mongo_setup import mongo_db
+
+        try:
+            recipes = list(mongo_db.recipes.find({}, {"ingredients.name": 1}))
+        except Exception as e:
+            logger.error(f"Error building cook index: {e}")
+            return False
+
+        self.build_from_recipes(recipes)
+        return True
+
+    def build_from_recipes(self, recipes):
+        """Replace the index contents with the given recipe documents"""
+        with self._lock:
+            self._reset()
+            for recipe in recipes:
+                self._add(recipe)
+            self._vocabulary = sorted(self._ingredient_ids)
+            self.built = True
+
+        logger.info(
+            f"Built cook index with {len(self._recipe_ids)} recipes "
+            f"and {len(self._ingredient_ids)} ingredients"
+        )
+
+    def _ingredient_id(self, name):
+        """Return the integer id for a canonical name, assigning a new one if needed"""
+        ingredient_id = self._ingredient_ids.get(name)
+
+        if ingredient_id is None:
+            ingredient_id = len(self._postings)
+            self._ingredient_ids[name] = ingredient_id
+            self._postings.append(set())
+
+        return ingredient_id
+
+    def _add(self, recipe):
+        """Index one recipe, replacing any previous version of it"""
+        recipe_id = str(recipe["_id"])
+        position = self._recipe_positions.get(recipe_id)
+
+        if position is None:
+            position = len(self._recipe_ids)
+            self._recipe_positions[recipe_id] = position
+            self._recipe_ids.append(recipe_id)
+            self._recipe_ingredients.append(None)
+        else:
+            for ingredient_id in self._recipe_ingredients[position]:
+                self._postings[ingredient_id].discard(position)
+
+        ingredient_ids = set()
+        for ingredient in recipe.get("ingredients", []):
+            name = normalize_ingredient_name(ingredient.get("name"))
+            if name:
+                ingredient_ids.add(self._ingredient_id(name))
+
+        for ingredient_id in ingredient_ids:
+            self._postings[ingredient_id].add(position)
+
+        self._recipe_ingredients[position] = array("i", sorted(ingredient_ids))
+
+    def add_recipe(self, recipe):
+        """Index a written recipe"""
+        if not recipe or not self.built:
+            return
+
+        with self._lock:
+            known = set(self._ingredient_ids)
+            self._add(recipe)
+
+            if len(self._ingredient_ids) != len(known):
+                self._vocabulary = sorted(self._ingredient_ids)
+
+    @property
+    def ingredient_count(self):
+        return len(self._postings)
+
+    def ingredient_ids(self):
+        """Return the mapping of canonical ingredient name to integer id"""
+        return self._ingredient_ids
+
+    def recipe_ids(self):
+        """Return recipe IDs in index position order"""
+        return self._recipe_ids
+
+    def recipe_ingredient_ids(self, position):
+        """Return the ingredient ids of the recipe at an index position"""
+        return list(self._recipe_ingredients[position])
+
+    def resolve(self, names):
+        """
+        Map ingredient names to the ids of every indexed ingredient they prefix
+
+        A pantry item called "chicken" covers recipe ingredients such as
+        "chicken breast", matching the behaviour of the old regex search.
+
+        Args:
+            names (iterable): Ingredient names
+
+        Returns:
+            set: Ingredient ids
+        """
+        self.ensure_built()
+
+        with self._lock:
+            return _resolve_names(self._vocabulary, self._ingredient_ids, names)
+
+    def snapshot(self):
+        """Return a CookIndexSnapshot of the current contents"""
+        self.ensure_built()
+
+        with self._lock:
+            return CookIndexSnapshot(
+                list(self._recipe_ids),
+                list(self._recipe_ingredients),
+                self._vocabulary,
+                self._ingredient_ids
+            )
+
+    def top_k(self, pantry_names, k=20, exclude_names=None):
+        """
+        Rank recipes by how much of their ingredient list the pantry covers
+
+        Args:
+            pantry_names (iterable): Ingredient names the user has
+            k (int, optional): Number of recipes to return, all matches when None
+            exclude_names (iterable, optional): Skip recipes using any of these
+
+        Returns:
+            list: (recipe_id, coverage) tuples, best coverage first, coverage in 0..1
+        """
+        pantry_ids = self.resolve(pantry_names)
+        if not pantry_ids:
+            return []
+
+        exclude_ids = self.resolve(exclude_names) if exclude_names else set()
+
+        with self._lock:
+            postings = self._postings
+
+            # Number of pantry ingredients each candidate recipe uses
+            matches = Counter()
+            for ingredient_id in pantry_ids:
+                matches.update(postings[ingredient_id])
+
+            excluded = set()
+            for ingredient_id in exclude_ids:
+                excluded |= postings[ingredient_id]
+
+            ingredients = self._recipe_ingredients
+            scored = [
+                (count / len(ingredients[position]), position)
+                for position, count in matches.items()
+                if position not in excluded
+            ]
+
+            if k is None:
+                scored.sort(reverse=True)
+            else:
+                scored = heapq.nlargest(k, scored)
+
+            return [(self._recipe_ids[position], coverage) for coverage, position in scored]
+
+# Shared index for this worker process
+cook_index = CookIndex()
@@ -0,0 +1,174 @@
+from database.mongo_setup import mongo_db
+from pymongo import UpdateOne
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fallback category mapping based on common ingredients
+CATEGORY_KEYWORDS = {
+    'produce': ['vegetable', 'fruit', 'tomato', 'carrot', 'lettuce', 'apple', 'banana', 'orange', 'onion', 'garlic'],
+    'meat': ['beef', 'chicken', 'pork', 'lamb', 'turkey', 'meat', 'fish', 'seafood', 'steak', 'bacon'],
+    'dairy': ['milk', 'cheese', 'yogurt', 'cream', 'butter', 'egg'],
+    'bakery': ['bread', 'bun', 'cake', 'pastry', 'dough', 'roll'],
+    'pantry': ['rice', 'pasta', 'bean', 'lentil', 'flour', 'sugar', 'oil', 'vinegar', 'sauce'],
+    'frozen': ['frozen', 'ice'],
+    'spices': ['spice', 'herb', 'salt', 'pepper', 'cinnamon', 'oregano', 'basil', 'thyme'],
+    'beverages': ['water', 'juice', 'soda', 'wine', 'beer', 'coffee', 'tea'],
+}
+
+def normalize_ingredient_name(name):
+    """Return the canonical form of an ingredient name used for matching"""
+    return " ".join((name or "").lower().split())
+
+class Ingredient:
+    """
+    Materialized catalog of canonical ingredients
+
+    The `ingredients` collection holds one document per canonical ingredient
+    name with its standard unit and category. It is derived from the recipes
+    collection and kept in sync by Recipe.save.
+    """
+
+    @staticmethod
+    def guess_category(ingredient_name):
+        """Suggest a category for an ingredient from keywords in its name"""
+        from models.category_classifier import category_classifier
+
+        return category_classifier.guess(ingredient_name)
+
+    @staticmethod
+    def _upsert_operations(ingredients):
+        """Build catalog upserts for (name, unit) pairs, keeping the first unit seen"""
+        operations = []
+        seen = set()
+
+        for name, unit in ingredients:
+            canonical = normalize_ingredient_name(name)
+            if not canonical or canonical in seen:
+                continue
+            seen.add(canonical)
+
+            operations.append(UpdateOne(
+                {"name": canonical},
+                {"$setOnInsert": {
+                    "name": canonical,
+                    "unit": unit,
+                    "category": Ingredient.guess_category(canonical)
+                }},
+                upsert=True
+            ))
+
+        return operations
+
+    @staticmethod
+    def sync_recipe(recipe):
+        """Add any new ingredients of a written recipe to the catalog"""
+        if not recipe:
+            return
+
+        try:
+            operations = Ingredient._upsert_operations(
+                (ingredient.get("name"), ingredient.get("unit"))
+                for ingredient in recipe.get("ingredients", [])
+            )
+
+            if operations:
+                mongo_db.ingredients.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Error syncing ingredient catalog: {e}")
+
+    @staticmethod
+    def rebuild_catalog(raise_errors=False):
+        """
+        Populate the catalog from every recipe in one aggregation
+
+        Args:
+            raise_errors (bool): Raise instead of logging, so a migration fails
+
+        Returns:
+            int: Number of ingredients added to the catalog
+        """
+        try:
+            pipeline = [
+                {"$unwind": "$ingredients"},
+                {"$group": {
+                    "_id": {"$toLower": "$ingredients.name"},
+                    "unit": {"$first": "$ingredients.unit"}
+                }}
+            ]
+
+            operations = Ingredient._upsert_operations(
+                (result["_id"], result.get("unit"))
+                for result in mongo_db.recipes.aggregate(pipeline)
+            )
+
+            if not operations:
+                return 0
+
+            result = mongo_db.ingredients.bulk_write(operations, ordered=False)
+            logger.info(f"Ingredient catalog rebuilt: {result.upserted_count} added")
+            return result.upserted_count
+        except Exception as e:
+            if raise_errors:
+                raise
+            logger.error(f"Error rebuilding ingredient catalog: {e}")
+            return 0
+
+    @staticmethod
+    def get_by_name(ingredient_name):
+        """
+        Look up a catalog ingredient by name
+
+        An exact match on the canonical name is tried first, then the first
+        catalog name starting with it. Both are served by the name index.
+
+        Args:
+            ingredient_name (str): Ingredient name
+
+        Returns:
+            dict: Catalog document or None
+        """
+        canonical = normalize_ingredient_name(ingredient_name)
+        if not canonical:
+            return None
+
+        try:
+            ingredient = mongo_db.ingredients.find_one({"name": canonical})
+
+            if not ingredient:
+                ingredient = mongo_db.ingredients.find_one(
+                    {"name": {"$regex": f"^{re.escape(canonical)}"}},
+                    sort=[("name", 1)]
+                )
+
+            return ingredient
+        except Exception as e:
+            logger.error(f"Error getting ingredient from catalog: {e}")
+            return None
+
+    @staticmethod
+    def get_by_names(ingredient_names):
+        """
+        Look up many catalog ingredients with one indexed query
+
+        Args:
+            ingredient_names (iterable): Ingredient names
+
+        Returns:
+            dict: Catalog documents keyed by canonical name; names not in the catalog are left out
+        """
+        canonical_names = {normalize_ingredient_name(name) for name in ingredient_names}
+        canonical_names.discard("")
+
+        if not canonical_names:
+            return {}
+
+        try:
+            return {
+                ingredient["name"]: ingredient
+                for ingredient in mongo_db.ingredients.find({"name": {"$in": list(canonical_names)}})
+            }
+        except Exception as e:
+            logger.error(f"Error getting ingredients from catalog: {e}")
+            return {}
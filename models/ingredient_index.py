@@ -0,0 +1,103 @@
+from bisect import bisect_left, insort
+import threading
+import logging
+from models.lazy_build import LazyBuild
+
+logger = logging.getLogger(__name__)
+
+class IngredientIndex(LazyBuild):
+    """
+    Per-worker prefix index of distinct recipe ingredient names
+
+    Names are kept in a sorted list of lowercase keys so a prefix lookup is a
+    bisect followed by a short forward scan, with no MongoDB round trip.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._keys = []
+        self._names = {}
+        self._lock = threading.Lock()
+
+    def build(self):
+        """Load every distinct ingredient name from the recipes collection"""
+        from database.mongo_setup import mongo_db
+
+        try:
+            names = mongo_db.recipes.distinct("ingredients.name")
+        except Exception as e:
+            logger.error(f"Error building ingredient index: {e}")
+            return False
+
+        display_names = {}
+        for name in names:
+            if name:
+                display_names.setdefault(name.lower(), name)
+
+        # Swap in the new structures at once so readers never see a partial index
+        with self._lock:
+            self._names = display_names
+            self._keys = sorted(display_names)
+            self.built = True
+
+        logger.info(f"Built ingredient index with {len(self._keys)} names")
+        return True
+
+    def add(self, names):
+        """Add ingredient names to the index"""
+        with self._lock:
+            new_names = [
+                name for name in names
+                if name and name.lower() not in self._names
+            ]
+
+            if not new_names:
+                return
+
+            # Copy on write so concurrent lookups keep a consistent list
+            keys = list(self._keys)
+            display_names = dict(self._names)
+            for name in new_names:
+                key = name.lower()
+                if key not in display_names:
+                    display_names[key] = name
+                    insort(keys, key)
+
+            self._names = display_names
+            self._keys = keys
+
+    def add_recipe(self, recipe):
+        """Add the ingredient names of a written recipe to the index"""
+        if recipe:
+            self.add(ingredient.get("name") for ingredient in recipe.get("ingredients", []))
+
+    def suggest(self, query, limit=10):
+        """
+        Get ingredient names starting with the query
+
+        Args:
+            query (str): Search prefix
+            limit (int): Maximum number of suggestions
+
+        Returns:
+            list: Ingredient names in alphabetical order
+        """
+        self.ensure_built()
+
+        prefix = query.lower()
+        keys = self._keys
+        names = self._names
+
+        suggestions = []
+        position = bisect_left(keys, prefix)
+        while position < len(keys) and len(suggestions) < limit:
+            key = keys[position]
+            if not key.startswith(prefix):
+                break
+            suggestions.append(names[key])
+            position += 1
+
+        return suggestions
+
+# Shared index for this worker process
+ingredient_index = IngredientIndex()
@@ -1,14 +1,101 @@
-from database.mysql_setup import get_connection
+from database.mysql_setup import db_cursor, transaction
+from database.schema import require_column
+from database.cache import create_cache
 from datetime import datetime, timedelta
 from config import Config
-from database.mongo_setup import mongo_db
-import pymongo
-import re
+from models.ingredient import Ingredient, normalize_ingredient_name
+from models.ingredient_index import ingredient_index
+from models.category_classifier import category_classifier
+from models.units import ingredients_to_base, to_base, from_base
 import logging
 
 logger = logging.getLogger(__name__)
 
+# inventory.ingredient_id is checked once per worker by Inventory.require_schema,
+# so every write goes through a single statement
+INSERT_ITEM_SQL = """
+    INSERT INTO inventory 
+    (user_id, ingredient_name, category, quantity, unit, expiry_date, ingredient_id) 
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+UPDATE_ITEM_SQL = """
+    UPDATE inventory 
+    SET ingredient_name = %s, category = %s, quantity = %s, unit = %s, expiry_date = %s, ingredient_id = %s
+    WHERE id = %s
+"""
+
+# Fields left as NULL keep their current value, so one statement serves partial edits
+BATCH_UPDATE_ITEM_SQL = """
+    UPDATE inventory 
+    SET ingredient_name = COALESCE(%s, ingredient_name),
+        category = COALESCE(%s, category),
+        quantity = COALESCE(%s, quantity),
+        unit = COALESCE(%s, unit),
+        expiry_date = COALESCE(%s, expiry_date),
+        ingredient_id = CASE WHEN %s THEN %s ELSE ingredient_id END
+    WHERE id = %s AND user_id = %s
+"""
+
+# Every inventory write bumps the owner's pantry version in the same
+# transaction, so all workers can tell when a cached pantry is stale
+BUMP_PANTRY_VERSION_SQL = """
+    INSERT INTO pantry_versions (user_id, version) VALUES (%s, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1
+"""
+
+BUMP_ITEM_PANTRY_VERSION_SQL = """
+    INSERT INTO pantry_versions (user_id, version)
+    SELECT user_id, 1 FROM inventory WHERE id = %s
+    ON DUPLICATE KEY UPDATE version = version + 1
+"""
+
+# Inventory items keyed by user ID, stored with the pantry version they were read at
+pantry_cache = create_cache('pantries', Config.PANTRY_CACHE_SIZE, Config.PANTRY_CACHE_TTL)
+
+# Columns every inventory read selects, in Inventory.from_row order
+INVENTORY_COLUMNS = (
+    "id", "user_id", "ingredient_name", "category", "quantity",
+    "unit", "expiry_date", "added_date", "ingredient_id"
+)
+
+SELECT_ITEM_SQL = f"SELECT {', '.join(INVENTORY_COLUMNS)} FROM inventory"
+
+class InventorySnapshot:
+    """
+    One user's pantry, read with a single query
+    
+    Holds the full item list (sorted by name), the items expiring within the
+    warning window (sorted by expiry date) and the items grouped by category.
+    """
+    
+    def __init__(self, items, expiring, by_category):
+        self.items = items
+        self.expiring = expiring
+        self.by_category = by_category
+    
+    @staticmethod
+    def from_items(items, days):
+        """Split a name-ordered item list into the snapshot views in one pass"""
+        expiry_limit = datetime.now().date() + timedelta(days=days)
+        expiring = []
+        by_category = {}
+        
+        for item in items:
+            by_category.setdefault(item.category, []).append(item)
+            
+            if item.expiry_date is not None and item.expiry_date <= expiry_limit:
+                expiring.append(item)
+        
+        expiring.sort(key=lambda item: item.expiry_date)
+        
+        return InventorySnapshot(items, expiring, by_category)
+
 class Inventory:
+    # Large pantries load thousands of rows per request; slots drop the
+    # per-instance __dict__
+    __slots__ = INVENTORY_COLUMNS
+    
     def __init__(self, id, user_id, ingredient_name, category, quantity, unit, expiry_date=None, added_date=None, ingredient_id=None):
         self.id = id
         self.user_id = user_id
@@ -20,158 +107,147 @@ class Inventory:
         self.added_date = added_date
         self.ingredient_id = ingredient_id
     
+    @classmethod
+    def from_row(cls, row):
+        """Build an item from a tuple cursor row selected with SELECT_ITEM_SQL"""
+        return cls(*row)
+    
     @staticmethod
-    def get_by_user_id(user_id):
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        try:
+    def require_schema():
+        """Fail with a clear message if the database predates inventory.ingredient_id"""
+        require_column("inventory", "ingredient_id")
+    
+    @staticmethod
+    def _load_user_items(user_id):
+        Inventory.require_schema()
+        with db_cursor() as cursor:
             cursor.execute(
-                "SELECT * FROM inventory WHERE user_id = %s ORDER BY ingredient_name",
+                f"{SELECT_ITEM_SQL} WHERE user_id = %s ORDER BY ingredient_name",
                 (user_id,)
             )
+            return [Inventory.from_row(row) for row in cursor.fetchall()]
+    
+    @staticmethod
+    def get_by_user_id(user_id):
+        try:
+            return Inventory._load_user_items(user_id)
+        except Exception as e:
+            logger.error(f"Error getting inventory items: {e}")
+            return []
+    
+    @staticmethod
+    def bump_pantry_version(cursor, user_id):
+        """Mark a user's pantry as changed, inside the caller's transaction"""
+        cursor.execute(BUMP_PANTRY_VERSION_SQL, (user_id,))
+    
+    @staticmethod
+    def get_pantry_version(user_id):
+        """Get the current version of a user's pantry with a primary key read"""
+        with db_cursor() as cursor:
+            cursor.execute("SELECT version FROM pantry_versions WHERE user_id = %s", (user_id,))
+            row = cursor.fetchone()
+        
+        return row[0] if row else 0
+    
+    @staticmethod
+    def get_pantry(user_id):
+        """
+        Get a user's inventory items, served from memory until the pantry changes
+        
+        The cached items are reused while the user's pantry version is
+        unchanged, so repeated reads cost one primary key lookup. The items
+        are shared between requests and must not be modified.
+        
+        Args:
+            user_id (int): User ID
             
-            inventory_items = []
-            for item in cursor.fetchall():
-                inventory_items.append(Inventory(
-                    id=item['id'],
-                    user_id=item['user_id'],
-                    ingredient_name=item['ingredient_name'],
-                    category=item['category'],
-                    quantity=item['quantity'],
-                    unit=item['unit'],
-                    expiry_date=item['expiry_date'],
-                    added_date=item['added_date'],
-                    ingredient_id=item.get('ingredient_id')
-                ))
+        Returns:
+            list: Inventory items sorted by name
+        """
+        try:
+            version = Inventory.get_pantry_version(user_id)
+        except Exception as e:
+            # Without a version the cache cannot be trusted, so read the items directly
+            logger.error(f"Error getting pantry version: {e}")
+            return Inventory.get_by_user_id(user_id)
+        
+        try:
+            cached = pantry_cache.get(user_id)
+            if cached and cached[0] == version:
+                return cached[1]
             
-            cursor.close()
-            return inventory_items
+            # Read after the version, so the items are never older than it
+            items = Inventory._load_user_items(user_id)
+            pantry_cache.set(user_id, (version, items))
+            return items
         except Exception as e:
-            cursor.close()
-            logger.error(f"Error getting inventory items: {e}")
+            logger.error(f"Error getting pantry: {e}")
             return []
     
     @staticmethod
-    def get_by_id(item_id):
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
+    def get_snapshot(user_id, days=Config.INVENTORY_EXPIRY_WARNING_DAYS):
+        """
+        Get a user's whole pantry with its expiring and per-category views
         
+        Args:
+            user_id (int): User ID
+            days (int): Items expiring within this many days count as expiring
+            
+        Returns:
+            InventorySnapshot: Snapshot of the user's inventory
+        """
+        return InventorySnapshot.from_items(Inventory.get_pantry(user_id), days)
+    
+    @staticmethod
+    def get_by_id(item_id):
         try:
-            cursor.execute("SELECT * FROM inventory WHERE id = %s", (item_id,))
-            item = cursor.fetchone()
-            cursor.close()
+            Inventory.require_schema()
+            with db_cursor() as cursor:
+                cursor.execute(f"{SELECT_ITEM_SQL} WHERE id = %s", (item_id,))
+                row = cursor.fetchone()
             
-            if not item:
+            if not row:
                 return None
             
-            return Inventory(
-                id=item['id'],
-                user_id=item['user_id'],
-                ingredient_name=item['ingredient_name'],
-                category=item['category'],
-                quantity=item['quantity'],
-                unit=item['unit'],
-                expiry_date=item['expiry_date'],
-                added_date=item['added_date'],
-                ingredient_id=item.get('ingredient_id')
-            )
+            return Inventory.from_row(row)
         except Exception as e:
-            cursor.close()
             logger.error(f"Error getting inventory item: {e}")
             return None
     
     @staticmethod
     def get_ingredient_id(ingredient_name):
-        """Get MongoDB ObjectID for an ingredient by name"""
-        try:
-            # Normalize ingredient name to lowercase
-            ingredient_name = ingredient_name.lower()
-            
-            # Search for the ingredient in the recipes collection using case-insensitive regex
-            results = mongo_db.recipes.aggregate([
-                {"$unwind": "$ingredients"},
-                {"$match": {"ingredients.name": {"$regex": f"^{re.escape(ingredient_name)}", "$options": "i"}}},
-                {"$limit": 1}
-            ])
-            
-            results_list = list(results)
-            if results_list:
-                # Return the MongoDB ObjectID as a string
-                return str(results_list[0]['_id'])
-            
-            return None
-        except Exception as e:
-            logger.error(f"Error getting ingredient ID: {e}")
-            return None
+        """Get the catalog ID for an ingredient by name"""
+        ingredient = Ingredient.get_by_name(ingredient_name)
+        
+        if ingredient:
+            return str(ingredient['_id'])
+        
+        return None
     
     @staticmethod
     def get_ingredient_unit(ingredient_name):
         """Get standard unit for an ingredient by name"""
-        try:
-            # Normalize ingredient name to lowercase
-            ingredient_name = ingredient_name.lower()
-            
-            # Search for the ingredient using case-insensitive regex
-            results = mongo_db.recipes.aggregate([
-                {"$unwind": "$ingredients"},
-                {"$match": {"ingredients.name": {"$regex": f"^{re.escape(ingredient_name)}", "$options": "i"}}},
-                {"$limit": 1}
-            ])
-            
-            results_list = list(results)
-            if results_list:
-                # Return the unit
-                return results_list[0]['ingredients']['unit']
-            
-            return None
-        except Exception as e:
-            logger.error(f"Error getting ingredient unit: {e}")
-            return None
+        ingredient = Ingredient.get_by_name(ingredient_name)
+        
+        if ingredient:
+            return ingredient.get('unit')
+        
+        return None
     
     @staticmethod
     def get_ingredient_category(ingredient_name):
-        """Get suggested category for an ingredient based on recipes"""
-        try:
-            # Normalize ingredient name to lowercase
-            ingredient_name = ingredient_name.lower()
-            
-            # Try to find the ingredient in existing inventory items
-            conn = get_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            cursor.execute(
-                "SELECT category FROM inventory WHERE LOWER(ingredient_name) LIKE %s LIMIT 1",
-                (f"{ingredient_name}%",)
-            )
-            
-            existing = cursor.fetchone()
-            cursor.close()
-            
-            if existing:
-                return existing['category']
-            
-            # Fallback category mapping based on common ingredients
-            category_keywords = {
-                'produce': ['vegetable', 'fruit', 'tomato', 'carrot', 'lettuce', 'apple', 'banana', 'orange', 'onion', 'garlic'],
-                'meat': ['beef', 'chicken', 'pork', 'lamb', 'turkey', 'meat', 'fish', 'seafood', 'steak', 'bacon'],
-                'dairy': ['milk', 'cheese', 'yogurt', 'cream', 'butter', 'egg'],
-                'bakery': ['bread', 'bun', 'cake', 'pastry', 'dough', 'roll'],
-                'pantry': ['rice', 'pasta', 'bean', 'lentil', 'flour', 'sugar', 'oil', 'vinegar', 'sauce'],
-                'frozen': ['frozen', 'ice'],
-                'spices': ['spice', 'herb', 'salt', 'pepper', 'cinnamon', 'oregano', 'basil', 'thyme'],
-                'beverages': ['water', 'juice', 'soda', 'wine', 'beer', 'coffee', 'tea'],
-            }
-            
-            # Check if the ingredient name contains any keywords
-            for category, keywords in category_keywords.items():
-                if any(keyword in ingredient_name for keyword in keywords):
-                    return category
-            
-            return 'other'  # Default category
-        except Exception as e:
-            logger.error(f"Error getting ingredient category: {e}")
-            return 'other'  # Default category on error
+        """Get suggested category for an ingredient, without a database call"""
+        return category_classifier.classify(ingredient_name)
+    
+    @staticmethod
+    def get_ingredient_info(ingredient_name):
+        """Get suggested unit and category for an ingredient with one catalog read"""
+        ingredient = Ingredient.get_by_name(ingredient_name)
+        
+        return {
+            'unit': ingredient.get('unit') if ingredient else None,
+            'category': category_classifier.classify(ingredient_name)
+        }
     
     @staticmethod
     def add_item(user_id, ingredient_name, category, quantity, unit, expiry_date=None):
@@ -182,41 +258,20 @@ class Inventory:
             logger.warning(f"Ingredient not found in MongoDB: {ingredient_name}")
             # We'll still add it to the inventory even if not in recipe database
         
-        conn = get_connection()
-        cursor = conn.cursor()
-        
         try:
-            # Check if table has ingredient_id column
-            cursor.execute("SHOW COLUMNS FROM inventory LIKE 'ingredient_id'")
-            has_ingredient_id = cursor.fetchone() is not None
-            
-            if has_ingredient_id and ingredient_id:
+            Inventory.require_schema()
+            with transaction() as cursor:
                 cursor.execute(
-                    """
-                    INSERT INTO inventory 
-                    (user_id, ingredient_name, category, quantity, unit, expiry_date, ingredient_id) 
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    """,
+                    INSERT_ITEM_SQL,
                     (user_id, ingredient_name, category, quantity, unit, expiry_date, ingredient_id)
                 )
-            else:
-                cursor.execute(
-                    """
-                    INSERT INTO inventory 
-                    (user_id, ingredient_name, category, quantity, unit, expiry_date) 
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    """,
-                    (user_id, ingredient_name, category, quantity, unit, expiry_date)
-                )
                 
-            conn.commit()
-            item_id = cursor.lastrowid
-            cursor.close()
+                item_id = cursor.lastrowid
+                Inventory.bump_pantry_version(cursor, user_id)
             
+            category_classifier.learn(ingredient_name, category)
             return Inventory.get_by_id(item_id)
         except Exception as e:
-            conn.rollback()
-            cursor.close()
             logger.error(f"Error adding inventory item: {e}")
             return None
     
@@ -225,100 +280,256 @@ class Inventory:
         # First check if the ingredient exists in MongoDB
         ingredient_id = Inventory.get_ingredient_id(ingredient_name)
         
-        conn = get_connection()
-        cursor = conn.cursor()
-        
         try:
-            # Check if table has ingredient_id column
-            cursor.execute("SHOW COLUMNS FROM inventory LIKE 'ingredient_id'")
-            has_ingredient_id = cursor.fetchone() is not None
-            
-            if has_ingredient_id and ingredient_id:
+            Inventory.require_schema()
+            with transaction() as cursor:
+                cursor.execute(BUMP_ITEM_PANTRY_VERSION_SQL, (item_id,))
                 cursor.execute(
-                    """
-                    UPDATE inventory 
-                    SET ingredient_name = %s, category = %s, quantity = %s, unit = %s, expiry_date = %s, ingredient_id = %s
-                    WHERE id = %s
-                    """,
+                    UPDATE_ITEM_SQL,
                     (ingredient_name, category, quantity, unit, expiry_date, ingredient_id, item_id)
                 )
-            else:
-                cursor.execute(
-                    """
-                    UPDATE inventory 
-                    SET ingredient_name = %s, category = %s, quantity = %s, unit = %s, expiry_date = %s
-                    WHERE id = %s
-                    """,
-                    (ingredient_name, category, quantity, unit, expiry_date, item_id)
-                )
-                
-            conn.commit()
-            cursor.close()
             
+            category_classifier.learn(ingredient_name, category)
             return Inventory.get_by_id(item_id)
         except Exception as e:
-            conn.rollback()
-            cursor.close()
             logger.error(f"Error updating inventory item: {e}")
             return None
     
     @staticmethod
-    def delete_item(item_id):
-        conn = get_connection()
-        cursor = conn.cursor()
+    def add_items(user_id, items):
+        """
+        Add many inventory items in one transaction
+        
+        Ingredient IDs are resolved with a single catalog query, missing
+        categories are classified in one batch without a database call, and
+        the rows are written with one executemany.
+        
+        Args:
+            user_id (int): User ID
+            items (list): Dictionaries with ingredient_name, quantity, unit and
+                optional category and expiry_date
+            
+        Returns:
+            int: Number of items added, or None on error
+        """
+        if not items:
+            return 0
+        
+        catalog = Ingredient.get_by_names(item['ingredient_name'] for item in items)
+        guessed = iter(category_classifier.classify_many(
+            item['ingredient_name'] for item in items if not item.get('category')
+        ))
+        
+        rows = []
+        for item in items:
+            ingredient = catalog.get(normalize_ingredient_name(item['ingredient_name']))
+            category = item.get('category') or next(guessed)
+            
+            rows.append((
+                user_id,
+                item['ingredient_name'],
+                category,
+                item['quantity'],
+                item['unit'],
+                item.get('expiry_date'),
+                str(ingredient['_id']) if ingredient else None
+            ))
+        
+        try:
+            Inventory.require_schema()
+            with transaction() as cursor:
+                cursor.executemany(INSERT_ITEM_SQL, rows)
+                Inventory.bump_pantry_version(cursor, user_id)
+            
+            for item in items:
+                category_classifier.learn(item['ingredient_name'], item.get('category'))
+            
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Error importing inventory items: {e}")
+            return None
+    
+    @staticmethod
+    def update_items(user_id, items):
+        """
+        Edit many of a user's inventory items in one transaction
+        
+        Args:
+            user_id (int): User ID, items owned by other users are left alone
+            items (list): Dictionaries with an id and any of ingredient_name,
+                category, quantity, unit and expiry_date
+            
+        Returns:
+            int: Number of rows changed, or None on error
+        """
+        if not items:
+            return 0
+        
+        catalog = Ingredient.get_by_names(
+            item['ingredient_name'] for item in items if item.get('ingredient_name')
+        )
+        
+        rows = []
+        for item in items:
+            name = item.get('ingredient_name')
+            ingredient = catalog.get(normalize_ingredient_name(name)) if name else None
+            
+            rows.append((
+                name,
+                item.get('category'),
+                item.get('quantity'),
+                item.get('unit'),
+                item.get('expiry_date'),
+                name is not None,
+                str(ingredient['_id']) if ingredient else None,
+                item['id'],
+                user_id
+            ))
         
         try:
-            cursor.execute("DELETE FROM inventory WHERE id = %s", (item_id,))
-            conn.commit()
-            cursor.close()
+            Inventory.require_schema()
+            with transaction() as cursor:
+                cursor.executemany(BATCH_UPDATE_ITEM_SQL, rows)
+                changed = cursor.rowcount
+                
+                if changed:
+                    Inventory.bump_pantry_version(cursor, user_id)
+            
+            for item in items:
+                category_classifier.learn(item.get('ingredient_name'), item.get('category'))
+            
+            return changed
+        except Exception as e:
+            logger.error(f"Error batch editing inventory items: {e}")
+            return None
+    
+    @staticmethod
+    def deduct_ingredients(cursor, user_id, ingredients, scale=1.0):
+        """
+        Subtract recipe ingredients from a user's inventory
+        
+        Runs inside the caller's transaction. The matching rows are locked with
+        SELECT ... FOR UPDATE so concurrent completions cannot spend the same
+        item twice, and the changes are written with one UPDATE and one DELETE
+        however many ingredients the recipe has. Items expiring soonest are
+        used first and items that reach zero are removed.
+        
+        Args:
+            cursor: Cursor of an open transaction (tuple rows)
+            user_id (int): User ID
+            ingredients (list): Recipe ingredients with name, amount and unit
+            scale (float): Multiplier for the ingredient amounts
+            
+        Returns:
+            list: Names of ingredients that could not be fully deducted
+        """
+        # Requirement per (ingredient, dimension) in base units
+        needed = {}
+        dimensions, base_amounts = ingredients_to_base(ingredients, scale)
+        for ingredient, dimension, amount in zip(ingredients, dimensions, base_amounts):
+            name = normalize_ingredient_name(ingredient.get('name'))
+            if name:
+                key = (name, dimension)
+                needed[key] = needed.get(key, 0) + float(amount)
+        
+        if not needed:
+            return []
+        
+        names = sorted({name for name, _ in needed})
+        placeholders = ", ".join(["%s"] * len(names))
+        cursor.execute(
+            f"""
+            SELECT id, ingredient_name, quantity, unit FROM inventory
+            WHERE user_id = %s AND LOWER(ingredient_name) IN ({placeholders})
+            ORDER BY expiry_date IS NULL, expiry_date, id
+            FOR UPDATE
+            """,
+            (user_id, *names)
+        )
+        
+        quantities = {}
+        for item_id, ingredient_name, quantity, unit in cursor.fetchall():
+            dimension, available = to_base(quantity, unit)
+            key = (normalize_ingredient_name(ingredient_name), dimension)
+            
+            amount = needed.get(key, 0)
+            if amount <= 0:
+                continue
+            
+            used = min(amount, available)
+            needed[key] = amount - used
+            quantities[item_id] = round(from_base(available - used, unit), 2)
+        
+        updates = [(item_id, quantity) for item_id, quantity in quantities.items() if quantity > 0]
+        deletes = [item_id for item_id, quantity in quantities.items() if quantity <= 0]
+        
+        if updates:
+            cases = " ".join(["WHEN %s THEN %s"] * len(updates))
+            id_placeholders = ", ".join(["%s"] * len(updates))
+            cursor.execute(
+                f"UPDATE inventory SET quantity = CASE id {cases} END WHERE id IN ({id_placeholders})",
+                [value for update in updates for value in update] + [item_id for item_id, _ in updates]
+            )
+        
+        if deletes:
+            id_placeholders = ", ".join(["%s"] * len(deletes))
+            cursor.execute(f"DELETE FROM inventory WHERE id IN ({id_placeholders})", deletes)
+        
+        if quantities:
+            Inventory.bump_pantry_version(cursor, user_id)
+        
+        return sorted({name for (name, _), amount in needed.items() if amount > 1e-9})
+    
+    @staticmethod
+    def delete_item(item_id):
+        try:
+            with transaction() as cursor:
+                cursor.execute(BUMP_ITEM_PANTRY_VERSION_SQL, (item_id,))
+                cursor.execute("DELETE FROM inventory WHERE id = %s", (item_id,))
             return True
         except Exception as e:
-            conn.rollback()
-            cursor.close()
             logger.error(f"Error deleting inventory item: {e}")
             return False
     
     @staticmethod
     def get_expiring_items(user_id, days=3):
         """Get inventory items that are expiring soon or already expired"""
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
         today = datetime.now().date()
         expiry_date = today + timedelta(days=days)
         
         try:
-            cursor.execute(
-                """
-                SELECT * FROM inventory 
-                WHERE user_id = %s AND expiry_date IS NOT NULL 
-                AND expiry_date <= %s
-                ORDER BY expiry_date
-                """,
-                (user_id, expiry_date)
-            )
-            
-            items = []
-            for item in cursor.fetchall():
-                items.append(Inventory(
-                    id=item['id'],
-                    user_id=item['user_id'],
-                    ingredient_name=item['ingredient_name'],
-                    category=item['category'],
-                    quantity=item['quantity'],
-                    unit=item['unit'],
-                    expiry_date=item['expiry_date'],
-                    added_date=item['added_date'],
-                    ingredient_id=item.get('ingredient_id')
-                ))
-            
-            cursor.close()
-            return items
+            Inventory.require_schema()
+            with db_cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    {SELECT_ITEM_SQL}
+                    WHERE user_id = %s AND expiry_date IS NOT NULL 
+                    AND expiry_date <= %s
+                    ORDER BY expiry_date
+                    """,
+                    (user_id, expiry_date)
+                )
+                return [Inventory.from_row(row) for row in cursor.fetchall()]
         except Exception as e:
-            cursor.close()
             logger.error(f"Error getting expiring items: {e}")
             return []
     
+    @staticmethod
+    def get_pantry_names_by_user():
+        """Get the ingredient names of every user's inventory, for batch scoring jobs"""
+        try:
+            pantries = {}
+            with db_cursor() as cursor:
+                cursor.execute("SELECT user_id, ingredient_name FROM inventory")
+                
+                for user_id, ingredient_name in cursor:
+                    pantries.setdefault(user_id, []).append(ingredient_name)
+            
+            return pantries
+        except Exception as e:
+            logger.error(f"Error getting pantries: {e}")
+            return {}
+    
     @staticmethod
     def get_ingredient_suggestions(query):
         """Get ingredient name suggestions for autocomplete"""
@@ -326,22 +537,7 @@ class Inventory:
             return []
         
         try:
-            # Normalize query to lowercase
-            query = query.lower()
-            
-            # Aggregate unique ingredient names that match the query
-            pipeline = [
-                {"$unwind": "$ingredients"},
-                {"$match": {"ingredients.name": {"$regex": f"^{re.escape(query)}", "$options": "i"}}},
-                {"$group": {"_id": "$ingredients.name"}},
-                {"$sort": {"_id": 1}},
-                {"$limit": 10}
-            ]
-            
-            results = mongo_db.recipes.aggregate(pipeline)
-            
-            # Return a list of ingredient names
-            return [result["_id"] for result in results]
+            return ingredient_index.suggest(query, limit=10)
         except Exception as e:
             logger.error(f"Error getting ingredient suggestions: {e}")
             return []
@@ -0,0 +1,49 @@
+import threading
+import time
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LazyBuild:
+    """
+    Base for per-worker structures loaded from the database on first use
+
+    Subclasses implement build(), returning True on success. The first
+    callers of ensure_built() wait for a single build; after a failed build
+    the structure stays empty and is not rebuilt for `retry_interval`
+    seconds, so an unreachable database costs one attempt per interval
+    rather than one per request.
+    """
+
+    def __init__(self, retry_interval=None):
+        self.built = False
+        self.retry_interval = Config.INDEX_BUILD_RETRY_INTERVAL if retry_interval is None else retry_interval
+        self._build_lock = threading.Lock()
+        self._failed_at = None
+
+    def build(self):
+        raise NotImplementedError
+
+    def _backing_off(self):
+        return self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_interval
+
+    def ensure_built(self):
+        """Build on first use; concurrent first callers wait for a single build"""
+        if self.built or self._backing_off():
+            return
+
+        with self._build_lock:
+            if self.built or self._backing_off():
+                return
+
+            if self.build():
+                self._failed_at = None
+            else:
+                self._failed_at = time.monotonic()
+                logger.warning(f"{type(self).__name__} build failed, retrying in {self.retry_interval}s")
+
+    def refresh(self):
+        """Reload after recipes changed elsewhere; an unbuilt structure loads on first use"""
+        if self.built:
+            self.build()
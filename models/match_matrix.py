@@ -0,0 +1,161 @@
+import json
+import numpy as np
+from scipy import sparse
+from flask.cli import with_appcontext
+import click
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MatchMatrix:
+    """
+    Sparse recipe x ingredient matrix for batch pantry scoring
+
+    Row r holds 1 / (number of ingredients of recipe r) in the columns of its
+    ingredients, so multiplying by a 0/1 pantry vector gives the coverage of
+    every recipe at once, and multiplying by a matrix of pantry columns scores
+    many users in one product. Ingredient ids and name resolution come from
+    the CookIndex, so matching is the same as Recipe.search_by_ingredients.
+    """
+
+    def __init__(self, index, matrix):
+        self.index = index
+        self.matrix = matrix
+        self.recipe_ids = list(index.recipe_ids())
+
+    @classmethod
+    def from_cook_index(cls, index):
+        """Build the matrix from a populated CookIndex"""
+        index.ensure_built()
+
+        rows = []
+        columns = []
+        weights = []
+
+        for position in range(len(index.recipe_ids())):
+            ingredient_ids = index.recipe_ingredient_ids(position)
+            if not ingredient_ids:
+                continue
+
+            weight = 1.0 / len(ingredient_ids)
+            rows.extend([position] * len(ingredient_ids))
+            columns.extend(ingredient_ids)
+            weights.extend([weight] * len(ingredient_ids))
+
+        matrix = sparse.csr_matrix(
+            (np.array(weights, dtype=np.float32), (rows, columns)),
+            shape=(len(index.recipe_ids()), index.ingredient_count),
+            dtype=np.float32
+        )
+
+        logger.info(f"Built match matrix {matrix.shape} with {matrix.nnz} entries")
+        return cls(index, matrix)
+
+    def pantry_vector(self, pantry_names):
+        """Return the 0/1 ingredient vector for a pantry"""
+        vector = np.zeros(self.matrix.shape[1], dtype=np.float32)
+        ingredient_ids = [
+            ingredient_id for ingredient_id in self.index.resolve(pantry_names)
+            if ingredient_id < vector.shape[0]
+        ]
+        vector[ingredient_ids] = 1.0
+        return vector
+
+    def pantry_matrix(self, pantries):
+        """Return a sparse ingredient x user matrix with one pantry per column"""
+        rows = []
+        columns = []
+
+        for column, pantry_names in enumerate(pantries):
+            ingredient_ids = [
+                ingredient_id for ingredient_id in self.index.resolve(pantry_names)
+                if ingredient_id < self.matrix.shape[1]
+            ]
+            rows.extend(ingredient_ids)
+            columns.extend([column] * len(ingredient_ids))
+
+        return sparse.csc_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+            shape=(self.matrix.shape[1], len(pantries)),
+            dtype=np.float32
+        )
+
+    def score(self, pantry_names):
+        """Return the coverage (0..1) of every recipe for one pantry"""
+        return self.matrix @ self.pantry_vector(pantry_names)
+
+    def score_many(self, pantries):
+        """Return a dense recipe x user matrix of coverage scores"""
+        return (self.matrix @ self.pantry_matrix(pantries)).toarray()
+
+    def top_k(self, scores, k=20, min_coverage=0.0):
+        """
+        Pick the best recipes from a coverage vector
+
+        Args:
+            scores (ndarray): Coverage per recipe
+            k (int): Number of recipes to return
+            min_coverage (float): Ignore recipes below this coverage
+
+        Returns:
+            list: (recipe_id, coverage) tuples, best coverage first
+        """
+        k = min(k, scores.shape[0])
+        if k <= 0:
+            return []
+
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+
+        return [
+            (self.recipe_ids[position], float(scores[position]))
+            for position in best
+            if scores[position] > min_coverage
+        ]
+
+    def digest(self, pantries_by_user, k=10, batch_size=512):
+        """
+        Score many users and keep each user's best recipes
+
+        Args:
+            pantries_by_user (dict): Pantry ingredient names keyed by user ID
+            k (int): Number of recipes per user
+            batch_size (int): Users scored per matrix product
+
+        Returns:
+            dict: (recipe_id, coverage) lists keyed by user ID
+        """
+        user_ids = list(pantries_by_user)
+        results = {}
+
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            scores = self.score_many([pantries_by_user[user_id] for user_id in batch])
+
+            for column, user_id in enumerate(batch):
+                results[user_id] = self.top_k(scores[:, column], k)
+
+        return results
+
+@click.command("digest")
+@click.option("--top", default=10, show_default=True, help="Recipes per user.")
+@click.option("--output", type=click.File("w"), default="-", help="File for the JSON lines, stdout by default.")
+@with_appcontext
+def digest_command(top, output):
+    """Write every user's best-covered recipes as JSON lines, for nightly digests."""
+    from models.cook_index import cook_index
+    from models.inventory import Inventory
+
+    pantries = Inventory.get_pantry_names_by_user()
+    matrix = MatchMatrix.from_cook_index(cook_index)
+
+    for user_id, recipes in matrix.digest(pantries, k=top).items():
+        output.write(json.dumps({
+            "user_id": user_id,
+            "recipes": [
+                {"recipe_id": recipe_id, "coverage": round(coverage, 4)}
+                for recipe_id, coverage in recipes
+            ]
+        }) + "\n")
+
+    click.echo(f"Scored {len(pantries)} pantries against {len(matrix.recipe_ids)} recipes", err=True)
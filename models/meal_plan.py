@@ -1,10 +1,30 @@
-from database.mysql_setup import get_connection
+from database.mysql_setup import db_cursor, transaction
 from datetime import datetime, timedelta
-from models.recipe import Recipe
+from config import Config
+from models.recipe import Recipe, MEAL_PLAN_RECIPE_PROJECTION
+from models.ingredient import normalize_ingredient_name
+from models.units import ingredients_to_base, to_base, from_base, normalize_unit
+from models.inventory import Inventory, InventorySnapshot
+from models.plan_generator import plan_generator
+from models.recipe_version import recipe_version
+import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Width of the text columns of meal_plan_grocery; longer values are truncated
+GROCERY_TEXT_LENGTH = 255
+
+class MealPlanNotFoundError(Exception):
+    """Raised when a meal plan does not exist or belongs to another user"""
+
+class UnknownRecipesError(ValueError):
+    """Raised when operations add recipes that do not exist"""
+    
+    def __init__(self, recipe_ids):
+        super().__init__(f"Unknown recipes: {', '.join(recipe_ids)}")
+        self.recipe_ids = recipe_ids
+
 class MealPlan:
     def __init__(self, id, user_id, week_start_date, items=None):
         self.id = id
@@ -13,251 +33,922 @@ class MealPlan:
         self.items = items or []
     
     @staticmethod
-    def get_by_user_id(user_id):
-        """Get all meal plans for a user"""
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
+    def _build_items(rows, recipes=None):
+        """
+        Turn meal_plan_items rows into item dictionaries with recipe details
         
-        try:
-            cursor.execute(
-                """
-                SELECT * FROM meal_plans 
-                WHERE user_id = %s 
-                ORDER BY week_start_date DESC
-                """,
-                (user_id,)
+        Args:
+            rows (list): meal_plan_items rows
+            recipes (dict, optional): Recipes keyed by ID, fetched in one batch when omitted
+            
+        Returns:
+            list: Items whose recipe still exists
+        """
+        if recipes is None:
+            recipes = Recipe.get_by_ids(
+                (row['recipe_id'] for row in rows),
+                MEAL_PLAN_RECIPE_PROJECTION
             )
+        
+        items = []
+        for row in rows:
+            recipe = recipes.get(row['recipe_id'])
             
-            meal_plans = []
-            for plan in cursor.fetchall():
-                # Get meal plan items
+            if recipe:
+                items.append({
+                    'id': row['id'],
+                    'meal_plan_id': row['meal_plan_id'],
+                    'recipe_id': row['recipe_id'],
+                    'day_of_week': row['day_of_week'],
+                    'meal_type': row['meal_type'],
+                    'recipe': recipe
+                })
+        
+        return items
+    
+    @staticmethod
+    def get_history(user_id, before=None, per_page=None):
+        """
+        Get one page of a user's meal plans, newest week first
+        
+        Plans and their items come from a single JOIN over a keyset page of
+        meal_plans, and the recipes of the whole page are fetched in one batch.
+        
+        Args:
+            user_id (int): User ID
+            before (tuple, optional): (week_start_date, id) of the last plan on the previous page
+            per_page (int, optional): Plans per page, defaults to Config.MEAL_PLAN_HISTORY_PER_PAGE
+            
+        Returns:
+            tuple: (list of meal plans, (week_start_date, id) to pass as `before`
+                for the next page or None)
+        """
+        per_page = per_page or Config.MEAL_PLAN_HISTORY_PER_PAGE
+        
+        conditions = "user_id = %s"
+        params = [user_id]
+        
+        # Plans of the same week are ordered by ID, so no plan is skipped or repeated
+        if before:
+            conditions += " AND (week_start_date, id) < (%s, %s)"
+            params.extend(before)
+        
+        try:
+            with db_cursor() as cursor:
+                # Fetch one extra plan to know whether another page exists
                 cursor.execute(
-                    """
-                    SELECT * FROM meal_plan_items 
-                    WHERE meal_plan_id = %s
+                    f"""
+                    SELECT p.id, p.week_start_date,
+                           i.id, i.recipe_id, i.day_of_week, i.meal_type
+                    FROM (
+                        SELECT id, week_start_date FROM meal_plans
+                        WHERE {conditions}
+                        ORDER BY week_start_date DESC, id DESC
+                        LIMIT %s
+                    ) AS p
+                    LEFT JOIN meal_plan_items AS i ON i.meal_plan_id = p.id
+                    ORDER BY p.week_start_date DESC, p.id DESC, i.day_of_week, i.id
                     """,
-                    (plan['id'],)
+                    (*params, per_page + 1)
                 )
+                rows = cursor.fetchall()
+            
+            plans = []
+            item_rows = {}
+            for plan_id, week_start_date, item_id, recipe_id, day_of_week, meal_type in rows:
+                if plan_id not in item_rows:
+                    item_rows[plan_id] = []
+                    plans.append((plan_id, week_start_date))
                 
-                items = []
-                for item in cursor.fetchall():
-                    # Get recipe details
-                    recipe = Recipe.get_by_id(item['recipe_id'])
-                    
-                    if recipe:
-                        items.append({
-                            'id': item['id'],
-                            'meal_plan_id': item['meal_plan_id'],
-                            'recipe_id': item['recipe_id'],
-                            'day_of_week': item['day_of_week'],
-                            'meal_type': item['meal_type'],
-                            'recipe': recipe
-                        })
-                
-                meal_plans.append(MealPlan(
-                    id=plan['id'],
-                    user_id=plan['user_id'],
-                    week_start_date=plan['week_start_date'],
-                    items=items
-                ))
-            
-            cursor.close()
-            return meal_plans
+                # Plans without items come back once with NULL item columns
+                if item_id is not None:
+                    item_rows[plan_id].append({
+                        'id': item_id,
+                        'meal_plan_id': plan_id,
+                        'recipe_id': recipe_id,
+                        'day_of_week': day_of_week,
+                        'meal_type': meal_type
+                    })
+            
+            next_before = None
+            if len(plans) > per_page:
+                plans = plans[:per_page]
+                next_before = (plans[-1][1], plans[-1][0])
+            
+            # Get recipe details for the whole page with one query
+            recipes = Recipe.get_by_ids(
+                (row['recipe_id'] for plan_id, _ in plans for row in item_rows[plan_id]),
+                MEAL_PLAN_RECIPE_PROJECTION
+            )
+            
+            meal_plans = [
+                MealPlan(
+                    id=plan_id,
+                    user_id=user_id,
+                    week_start_date=week_start_date,
+                    items=MealPlan._build_items(item_rows[plan_id], recipes)
+                )
+                for plan_id, week_start_date in plans
+            ]
+            
+            return meal_plans, next_before
         except Exception as e:
-            cursor.close()
-            logger.error(f"Error getting meal plans: {e}")
-            return []
+            logger.error(f"Error getting meal plan history: {e}")
+            return [], None
+    
+    @staticmethod
+    def get_by_user_id(user_id):
+        """Get all meal plans for a user, newest week first"""
+        meal_plans = []
+        before = None
+        
+        while True:
+            page, before = MealPlan.get_history(user_id, before)
+            meal_plans.extend(page)
+            
+            if before is None:
+                return meal_plans
     
     @staticmethod
     def get_by_id(plan_id):
         """Get a meal plan by ID"""
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
         try:
-            cursor.execute(
-                """
-                SELECT * FROM meal_plans 
-                WHERE id = %s
-                """,
-                (plan_id,)
-            )
-            
-            plan = cursor.fetchone()
-            
-            if not plan:
-                cursor.close()
-                return None
-            
-            # Get meal plan items
-            cursor.execute(
-                """
-                SELECT * FROM meal_plan_items 
-                WHERE meal_plan_id = %s
-                """,
-                (plan['id'],)
-            )
-            
-            items = []
-            for item in cursor.fetchall():
-                # Get recipe details
-                recipe = Recipe.get_by_id(item['recipe_id'])
+            with db_cursor(dictionary=True) as cursor:
+                cursor.execute(
+                    """
+                    SELECT * FROM meal_plans 
+                    WHERE id = %s
+                    """,
+                    (plan_id,)
+                )
                 
-                if recipe:
-                    items.append({
-                        'id': item['id'],
-                        'meal_plan_id': item['meal_plan_id'],
-                        'recipe_id': item['recipe_id'],
-                        'day_of_week': item['day_of_week'],
-                        'meal_type': item['meal_type'],
-                        'recipe': recipe
-                    })
-            
-            cursor.close()
+                plan = cursor.fetchone()
+                
+                if not plan:
+                    return None
+                
+                # Get meal plan items
+                cursor.execute(
+                    """
+                    SELECT * FROM meal_plan_items 
+                    WHERE meal_plan_id = %s
+                    """,
+                    (plan['id'],)
+                )
+                
+                rows = cursor.fetchall()
             
             return MealPlan(
                 id=plan['id'],
                 user_id=plan['user_id'],
                 week_start_date=plan['week_start_date'],
-                items=items
+                items=MealPlan._build_items(rows)
             )
         except Exception as e:
-            cursor.close()
             logger.error(f"Error getting meal plan: {e}")
             return None
     
     @staticmethod
     def get_current_week(user_id):
         """Get the current week's meal plan for a user"""
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
         # Calculate the start of the current week (Monday)
         today = datetime.now().date()
         start_of_week = today - timedelta(days=today.weekday())
         
         try:
-            cursor.execute(
-                """
-                SELECT * FROM meal_plans 
-                WHERE user_id = %s AND week_start_date = %s
-                """,
-                (user_id, start_of_week)
-            )
-            
-            plan = cursor.fetchone()
-            
-            # If no plan exists for the current week, create one
-            if not plan:
+            with transaction(dictionary=True) as cursor:
                 cursor.execute(
                     """
-                    INSERT INTO meal_plans (user_id, week_start_date)
-                    VALUES (%s, %s)
+                    SELECT * FROM meal_plans 
+                    WHERE user_id = %s AND week_start_date = %s
                     """,
                     (user_id, start_of_week)
                 )
                 
-                conn.commit()
-                
-                plan_id = cursor.lastrowid
+                plan = cursor.fetchone()
                 
-                cursor.close()
+                # If no plan exists for the current week, create one
+                if not plan:
+                    cursor.execute(
+                        """
+                        INSERT INTO meal_plans (user_id, week_start_date)
+                        VALUES (%s, %s)
+                        """,
+                        (user_id, start_of_week)
+                    )
+                    
+                    return MealPlan(
+                        id=cursor.lastrowid,
+                        user_id=user_id,
+                        week_start_date=start_of_week,
+                        items=[]
+                    )
                 
-                return MealPlan(
-                    id=plan_id,
-                    user_id=user_id,
-                    week_start_date=start_of_week,
-                    items=[]
+                # Get meal plan items
+                cursor.execute(
+                    """
+                    SELECT * FROM meal_plan_items 
+                    WHERE meal_plan_id = %s
+                    """,
+                    (plan['id'],)
                 )
-            
-            # Get meal plan items
-            cursor.execute(
-                """
-                SELECT * FROM meal_plan_items 
-                WHERE meal_plan_id = %s
-                """,
-                (plan['id'],)
-            )
-            
-            items = []
-            for item in cursor.fetchall():
-                # Get recipe details
-                recipe = Recipe.get_by_id(item['recipe_id'])
                 
-                if recipe:
-                    items.append({
-                        'id': item['id'],
-                        'meal_plan_id': item['meal_plan_id'],
-                        'recipe_id': item['recipe_id'],
-                        'day_of_week': item['day_of_week'],
-                        'meal_type': item['meal_type'],
-                        'recipe': recipe
-                    })
-            
-            cursor.close()
+                rows = cursor.fetchall()
             
             return MealPlan(
                 id=plan['id'],
                 user_id=plan['user_id'],
                 week_start_date=plan['week_start_date'],
-                items=items
+                items=MealPlan._build_items(rows)
             )
         except Exception as e:
-            conn.rollback()
-            cursor.close()
             logger.error(f"Error getting current week meal plan: {e}")
             return None
     
+    @staticmethod
+    def get_current_week_id(user_id):
+        """
+        Get the ID of the current week's meal plan without loading its items
+        
+        The plan is created if it does not exist yet.
+        
+        Args:
+            user_id (int): User ID
+            
+        Returns:
+            int: Meal plan ID, or None on error
+        """
+        today = datetime.now().date()
+        start_of_week = today - timedelta(days=today.weekday())
+        
+        try:
+            with transaction() as cursor:
+                cursor.execute(
+                    "SELECT id FROM meal_plans WHERE user_id = %s AND week_start_date = %s",
+                    (user_id, start_of_week)
+                )
+                rows = cursor.fetchall()
+                
+                if rows:
+                    return rows[0][0]
+                
+                cursor.execute(
+                    "INSERT INTO meal_plans (user_id, week_start_date) VALUES (%s, %s)",
+                    (user_id, start_of_week)
+                )
+                return cursor.lastrowid
+        except Exception as e:
+            logger.error(f"Error getting current week meal plan ID: {e}")
+            return None
+    
+    @staticmethod
+    def generate_week(user_id, preferences=None, meal_types=None):
+        """
+        Fill the empty slots of the current week's plan with generated recipes
+        
+        Recipes are picked to match the user's dietary preferences, use up
+        expiring inventory and keep the grocery list short. Slots that already
+        have a recipe are kept, and planned recipes are not picked again.
+        
+        Args:
+            user_id (int): User ID
+            preferences (dict, optional): Dietary preferences from user_preferences
+            meal_types (list, optional): Meal types to fill, defaults to every meal type
+            
+        Returns:
+            int: Number of recipes added, or None on error
+        """
+        meal_plan = MealPlan.get_current_week(user_id)
+        if not meal_plan:
+            return None
+        
+        meal_types = meal_types or [meal_type for meal_type, _ in Config.MEAL_TYPES]
+        filled = {(item['day_of_week'], item['meal_type']) for item in meal_plan.items}
+        slots = [
+            (day_of_week, meal_type)
+            for day_of_week, _ in Config.DAYS_OF_WEEK
+            for meal_type in meal_types
+            if (day_of_week, meal_type) not in filled
+        ]
+        
+        if not slots:
+            return 0
+        
+        # The pantry and its expiring items come from the same cached read
+        pantry = Inventory.get_pantry(user_id)
+        snapshot = InventorySnapshot.from_items(pantry, Config.INVENTORY_EXPIRY_WARNING_DAYS)
+        
+        plan = plan_generator.generate(
+            slots,
+            pantry_names=[item.ingredient_name for item in pantry],
+            expiring_items=[(item.ingredient_name, item.expiry_date) for item in snapshot.expiring],
+            preferences=preferences,
+            exclude_recipe_ids=[item['recipe_id'] for item in meal_plan.items]
+        )
+        
+        if plan is None:
+            return None
+        
+        if not plan['items']:
+            return 0
+        
+        try:
+            changes = MealPlan.apply_operations(
+                meal_plan.id,
+                user_id,
+                [dict(item, op='add') for item in plan['items']]
+            )
+        except (MealPlanNotFoundError, UnknownRecipesError) as e:
+            logger.error(f"Error generating meal plan: {e}")
+            return None
+        
+        return len(changes['added']) if changes else None
+    
     @staticmethod
     def add_recipe(plan_id, recipe_id, day_of_week, meal_type):
         """Add a recipe to a meal plan"""
-        conn = get_connection()
-        cursor = conn.cursor()
+        try:
+            with transaction() as cursor:
+                ready = MealPlan._lock_grocery(cursor, plan_id)
+                
+                cursor.execute(
+                    """
+                    INSERT INTO meal_plan_items (meal_plan_id, recipe_id, day_of_week, meal_type)
+                    VALUES (%s, %s, %s, %s)
+                    """,
+                    (plan_id, recipe_id, day_of_week, meal_type)
+                )
+                
+                item_id = cursor.lastrowid
+                
+                if ready:
+                    MealPlan._apply_grocery_changes(cursor, plan_id, [recipe_id], [])
+            
+            return item_id
+        except Exception as e:
+            logger.error(f"Error adding recipe to meal plan: {e}")
+            return None
+    
+    @staticmethod
+    def remove_recipe(item_id):
+        """Remove a recipe from a meal plan"""
+        try:
+            with transaction() as cursor:
+                cursor.execute(
+                    "SELECT meal_plan_id, recipe_id FROM meal_plan_items WHERE id = %s",
+                    (item_id,)
+                )
+                row = cursor.fetchone()
+                
+                if not row:
+                    return True
+                
+                plan_id, recipe_id = row
+                ready = MealPlan._lock_grocery(cursor, plan_id)
+                
+                cursor.execute(
+                    """
+                    DELETE FROM meal_plan_items 
+                    WHERE id = %s
+                    """,
+                    (item_id,)
+                )
+                
+                if ready and cursor.rowcount:
+                    MealPlan._apply_grocery_changes(cursor, plan_id, [], [recipe_id])
+            
+            return True
+        except Exception as e:
+            logger.error(f"Error removing recipe from meal plan: {e}")
+            return False
+    
+    @staticmethod
+    def apply_operations(plan_id, user_id, operations):
+        """
+        Apply a batch of add, move and remove operations to a meal plan
+        
+        Everything runs in one transaction with one statement per kind of
+        operation: an executemany INSERT for adds, a CASE UPDATE for moves and
+        a DELETE ... IN for removes. The materialized grocery requirement is
+        updated in the same transaction.
+        
+        Args:
+            plan_id (int): Meal plan ID
+            user_id (int): User ID, operations on other users' plans are refused
+            operations (list): Dictionaries with an op of 'add' (recipe_id,
+                day_of_week, meal_type), 'move' (item_id, day_of_week,
+                meal_type) or 'remove' (item_id)
+            
+        Returns:
+            dict: 'added' and 'moved' items with recipe details and 'removed'
+                item IDs, or None on error
+            
+        Raises:
+            UnknownRecipesError: If an add names a recipe that does not exist
+            MealPlanNotFoundError: If the plan does not exist or is not the user's
+        """
+        adds = [op for op in operations if op['op'] == 'add']
+        moves = {op['item_id']: op for op in operations if op['op'] == 'move'}
+        removes = {op['item_id'] for op in operations if op['op'] == 'remove'}
+        
+        # Removing an item wins over moving it in the same batch
+        for item_id in removes:
+            moves.pop(item_id, None)
+        
+        # Check added recipes before taking any locks
+        recipe_ids = {op['recipe_id'] for op in adds}
+        if recipe_ids:
+            unknown = recipe_ids - set(Recipe.get_by_ids(recipe_ids, {"_id": 1}))
+            if unknown:
+                raise UnknownRecipesError(sorted(unknown))
         
         try:
+            with transaction() as cursor:
+                cursor.execute(
+                    "SELECT user_id, grocery_ready FROM meal_plans WHERE id = %s FOR UPDATE",
+                    (plan_id,)
+                )
+                rows = cursor.fetchall()
+                
+                if not rows or rows[0][0] != user_id:
+                    raise MealPlanNotFoundError(f"Meal plan {plan_id} not found")
+                
+                ready = bool(rows[0][1])
+                
+                # Only items of this plan can be moved or removed
+                existing = {}
+                item_ids = list(moves) + list(removes)
+                if item_ids:
+                    placeholders = ", ".join(["%s"] * len(item_ids))
+                    cursor.execute(
+                        f"""
+                        SELECT id, recipe_id FROM meal_plan_items
+                        WHERE meal_plan_id = %s AND id IN ({placeholders})
+                        """,
+                        (plan_id, *item_ids)
+                    )
+                    existing = dict(cursor.fetchall())
+                
+                removed = [item_id for item_id in removes if item_id in existing]
+                if removed:
+                    placeholders = ", ".join(["%s"] * len(removed))
+                    cursor.execute(
+                        f"DELETE FROM meal_plan_items WHERE meal_plan_id = %s AND id IN ({placeholders})",
+                        (plan_id, *removed)
+                    )
+                
+                moved = [op for item_id, op in moves.items() if item_id in existing]
+                if moved:
+                    cases = " ".join(["WHEN %s THEN %s"] * len(moved))
+                    placeholders = ", ".join(["%s"] * len(moved))
+                    cursor.execute(
+                        f"""
+                        UPDATE meal_plan_items
+                        SET day_of_week = CASE id {cases} END,
+                            meal_type = CASE id {cases} END
+                        WHERE meal_plan_id = %s AND id IN ({placeholders})
+                        """,
+                        [value for op in moved for value in (op['item_id'], op['day_of_week'])]
+                        + [value for op in moved for value in (op['item_id'], op['meal_type'])]
+                        + [plan_id]
+                        + [op['item_id'] for op in moved]
+                    )
+                
+                added_rows = []
+                if adds:
+                    # The plan row is locked, so every item of this plan above the
+                    # current highest ID after the insert is one of ours
+                    cursor.execute(
+                        "SELECT COALESCE(MAX(id), 0) FROM meal_plan_items WHERE meal_plan_id = %s",
+                        (plan_id,)
+                    )
+                    last_id = cursor.fetchall()[0][0]
+                    
+                    cursor.executemany(
+                        """
+                        INSERT INTO meal_plan_items (meal_plan_id, recipe_id, day_of_week, meal_type)
+                        VALUES (%s, %s, %s, %s)
+                        """,
+                        [(plan_id, op['recipe_id'], op['day_of_week'], op['meal_type']) for op in adds]
+                    )
+                    
+                    cursor.execute(
+                        """
+                        SELECT id, meal_plan_id, recipe_id, day_of_week, meal_type
+                        FROM meal_plan_items
+                        WHERE meal_plan_id = %s AND id > %s
+                        ORDER BY id
+                        """,
+                        (plan_id, last_id)
+                    )
+                    added_rows = [
+                        dict(zip(('id', 'meal_plan_id', 'recipe_id', 'day_of_week', 'meal_type'), row))
+                        for row in cursor.fetchall()
+                    ]
+                
+                if ready:
+                    MealPlan._apply_grocery_changes(
+                        cursor,
+                        plan_id,
+                        [op['recipe_id'] for op in adds],
+                        [existing[item_id] for item_id in removed]
+                    )
+            
+            moved_rows = [
+                {
+                    'id': op['item_id'],
+                    'meal_plan_id': plan_id,
+                    'recipe_id': existing[op['item_id']],
+                    'day_of_week': op['day_of_week'],
+                    'meal_type': op['meal_type']
+                }
+                for op in moved
+            ]
+            
+            # Recipe details for the changed items only, in one batch
+            recipes = Recipe.get_by_ids(
+                (row['recipe_id'] for row in added_rows + moved_rows),
+                MEAL_PLAN_RECIPE_PROJECTION
+            )
+            
+            return {
+                'added': MealPlan._build_items(added_rows, recipes),
+                'moved': MealPlan._build_items(moved_rows, recipes),
+                'removed': removed
+            }
+        except MealPlanNotFoundError:
+            raise
+        except Exception as e:
+            logger.error(f"Error applying meal plan operations: {e}")
+            return None
+    
+    @staticmethod
+    def _lock_grocery(cursor, plan_id):
+        """
+        Lock a plan's row for the rest of the transaction
+        
+        Item writes and grocery rebuilds take this lock first, so a rebuild
+        never misses an item that is added or removed while it runs.
+        
+        Returns:
+            bool: Whether the plan's grocery requirement is materialized
+        """
+        cursor.execute("SELECT grocery_ready FROM meal_plans WHERE id = %s FOR UPDATE", (plan_id,))
+        row = cursor.fetchone()
+        return bool(row and row[0])
+    
+    @staticmethod
+    def _apply_grocery_changes(cursor, plan_id, added_recipe_ids, removed_recipe_ids):
+        """
+        Add and subtract recipes' contributions to a materialized grocery requirement
+        
+        Args:
+            cursor: Cursor inside the caller's transaction, holding the plan lock
+            plan_id (int): Meal plan ID
+            added_recipe_ids (list): Recipe IDs added to the plan, once per item
+            removed_recipe_ids (list): Recipe IDs removed from the plan, once per item
+        """
+        recipes = Recipe.get_by_ids(
+            list(added_recipe_ids) + list(removed_recipe_ids),
+            MEAL_PLAN_RECIPE_PROJECTION
+        )
+        
+        added = {}
+        for recipe_id in added_recipe_ids:
+            if recipe_id in recipes:
+                MealPlan._add_requirements(added, recipes[recipe_id].get('ingredients', []))
+        
+        removed = {}
+        for recipe_id in removed_recipe_ids:
+            if recipe_id in recipes:
+                MealPlan._add_requirements(removed, recipes[recipe_id].get('ingredients', []))
+        
+        if added:
+            # The unit of an existing line is kept; amounts are in base units
+            cursor.executemany(
+                """
+                INSERT INTO meal_plan_grocery
+                    (meal_plan_id, line_key, ingredient_name, dimension, unit, amount, uses)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE amount = amount + VALUES(amount), uses = uses + VALUES(uses)
+                """,
+                [MealPlan._grocery_row(plan_id, key, line) for key, line in added.items()]
+            )
+        
+        if removed:
+            cursor.executemany(
+                """
+                UPDATE meal_plan_grocery SET amount = GREATEST(amount - %s, 0), uses = uses - %s
+                WHERE meal_plan_id = %s AND line_key = %s
+                """,
+                [
+                    (line['amount'], line['uses'], plan_id, MealPlan._grocery_key(key))
+                    for key, line in removed.items()
+                ]
+            )
+            
+            # Zero-amount ("to taste") lines stay while a recipe in the plan uses them
             cursor.execute(
+                "DELETE FROM meal_plan_grocery WHERE meal_plan_id = %s AND uses <= 0",
+                (plan_id,)
+            )
+    
+    @staticmethod
+    def _grocery_key(key):
+        """Fixed-width key of a (ingredient name, dimension) line, for any name length"""
+        name, dimension = key
+        return hashlib.sha1(f"{name}\0{dimension}".encode("utf-8")).digest()
+    
+    @staticmethod
+    def _grocery_row(plan_id, key, line):
+        """meal_plan_grocery row for a requirement line, text truncated to the column width"""
+        name, dimension = key
+        return (
+            plan_id,
+            MealPlan._grocery_key(key),
+            name[:GROCERY_TEXT_LENGTH],
+            dimension[:GROCERY_TEXT_LENGTH],
+            line['unit'][:GROCERY_TEXT_LENGTH],
+            line['amount'],
+            line['uses']
+        )
+    
+    @staticmethod
+    def _rebuild_grocery(cursor, plan_id):
+        """
+        Materialize a plan's grocery requirement from its items
+        
+        Args:
+            cursor: Cursor inside the caller's transaction, holding the plan lock
+            plan_id (int): Meal plan ID
+            
+        Returns:
+            dict: Requirement lines keyed by (ingredient name, dimension)
+        """
+        cursor.execute("SELECT recipe_id FROM meal_plan_items WHERE meal_plan_id = %s", (plan_id,))
+        recipe_ids = [row[0] for row in cursor.fetchall()]
+        
+        recipes = Recipe.get_by_ids(recipe_ids, MEAL_PLAN_RECIPE_PROJECTION)
+        
+        requirements = {}
+        for recipe_id in recipe_ids:
+            if recipe_id in recipes:
+                MealPlan._add_requirements(requirements, recipes[recipe_id].get('ingredients', []))
+        
+        cursor.execute("DELETE FROM meal_plan_grocery WHERE meal_plan_id = %s", (plan_id,))
+        if requirements:
+            cursor.executemany(
                 """
-                INSERT INTO meal_plan_items (meal_plan_id, recipe_id, day_of_week, meal_type)
-                VALUES (%s, %s, %s, %s)
+                INSERT INTO meal_plan_grocery
+                    (meal_plan_id, line_key, ingredient_name, dimension, unit, amount, uses)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
                 """,
-                (plan_id, recipe_id, day_of_week, meal_type)
+                [MealPlan._grocery_row(plan_id, key, line) for key, line in requirements.items()]
             )
+        cursor.execute("UPDATE meal_plans SET grocery_ready = TRUE WHERE id = %s", (plan_id,))
+        
+        return requirements
+    
+    @staticmethod
+    def get_grocery_requirements(plan_id):
+        """
+        Get the materialized grocery requirement of a meal plan
+        
+        The requirement is read from meal_plan_grocery, one row per line. It is
+        built from the plan's recipes only the first time, or after a recipe in
+        the plan was edited.
+        
+        Args:
+            plan_id (int): Meal plan ID
             
-            conn.commit()
-            item_id = cursor.lastrowid
-            cursor.close()
+        Returns:
+            dict: Requirement lines keyed by (ingredient name, dimension), amounts
+                in base units, or None on error
+        """
+        try:
+            with db_cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT g.ingredient_name, g.dimension, g.unit, g.amount, p.grocery_ready
+                    FROM meal_plans AS p
+                    LEFT JOIN meal_plan_grocery AS g ON g.meal_plan_id = p.id
+                    WHERE p.id = %s
+                    """,
+                    (plan_id,)
+                )
+                rows = cursor.fetchall()
             
-            return item_id
+            if rows and rows[0][4]:
+                return {
+                    (name, dimension): {'name': name, 'unit': unit, 'amount': amount}
+                    for name, dimension, unit, amount, _ in rows
+                    if name is not None
+                }
+            
+            with transaction() as cursor:
+                MealPlan._lock_grocery(cursor, plan_id)
+                return MealPlan._rebuild_grocery(cursor, plan_id)
         except Exception as e:
-            conn.rollback()
-            cursor.close()
-            logger.error(f"Error adding recipe to meal plan: {e}")
+            logger.error(f"Error getting grocery requirement: {e}")
             return None
     
     @staticmethod
-    def remove_recipe(item_id):
-        """Remove a recipe from a meal plan"""
-        conn = get_connection()
-        cursor = conn.cursor()
+    def get_plan_grocery_list(plan_id, user_inventory=None):
+        """
+        Get the grocery list for a meal plan from its materialized requirement
         
-        try:
+        Only the inventory subtraction runs per view, so the cost depends on
+        the number of lines rather than on the recipes in the plan.
+        
+        Args:
+            plan_id (int): Meal plan ID
+            user_inventory (list, optional): List of inventory items
+            
+        Returns:
+            list: Ingredients still needed, sorted by name, or None on error
+        """
+        requirements = MealPlan.get_grocery_requirements(plan_id)
+        if requirements is None:
+            return None
+        
+        return MealPlan._grocery_lines(requirements, user_inventory)
+    
+    @staticmethod
+    def get_recipe_counts(user_id, start_date, end_date):
+        """
+        Count how often each recipe is planned between two dates
+        
+        One grouped query over every plan in the range; the plans are found
+        through the (user_id, week_start_date) index and each item's own day
+        is checked against the range.
+        
+        Args:
+            user_id (int): User ID
+            start_date (date): First day, inclusive
+            end_date (date): Last day, inclusive
+            
+        Returns:
+            dict: Number of planned meals keyed by recipe ID
+        """
+        with db_cursor() as cursor:
             cursor.execute(
                 """
-                DELETE FROM meal_plan_items 
-                WHERE id = %s
+                SELECT i.recipe_id, COUNT(*)
+                FROM meal_plans AS p
+                JOIN meal_plan_items AS i ON i.meal_plan_id = p.id
+                WHERE p.user_id = %s
+                AND p.week_start_date BETWEEN %s AND %s
+                AND DATE_ADD(p.week_start_date, INTERVAL i.day_of_week DAY) BETWEEN %s AND %s
+                GROUP BY i.recipe_id
                 """,
-                (item_id,)
+                (user_id, start_date - timedelta(days=6), end_date, start_date, end_date)
             )
+            return {recipe_id: count for recipe_id, count in cursor}
+    
+    @staticmethod
+    def get_range_grocery_list(user_id, start_date, end_date, user_inventory=None):
+        """
+        Generate one grocery list for every meal planned between two dates
+        
+        Each distinct recipe is fetched once in a single batch and its
+        ingredients are added once, scaled by how often it is planned, so a
+        month costs about the same as a week.
+        
+        Args:
+            user_id (int): User ID
+            start_date (date): First day, inclusive
+            end_date (date): Last day, inclusive
+            user_inventory (list, optional): List of inventory items
             
-            conn.commit()
-            cursor.close()
+        Returns:
+            tuple: (list of ingredients still needed, number of planned meals)
+        """
+        try:
+            recipe_counts = MealPlan.get_recipe_counts(user_id, start_date, end_date)
+            recipes = Recipe.get_by_ids(recipe_counts, MEAL_PLAN_RECIPE_PROJECTION)
             
-            return True
+            requirements = {}
+            for recipe_id, count in recipe_counts.items():
+                recipe = recipes.get(recipe_id)
+                if recipe:
+                    MealPlan._add_requirements(requirements, recipe.get('ingredients', []), count)
+            
+            return (
+                MealPlan._grocery_lines(requirements, user_inventory),
+                sum(recipe_counts.values())
+            )
         except Exception as e:
-            conn.rollback()
-            cursor.close()
-            logger.error(f"Error removing recipe from meal plan: {e}")
-            return False
+            logger.error(f"Error getting range grocery list: {e}")
+            return [], 0
+    
+    @staticmethod
+    def invalidate_grocery_for_recipe(recipe):
+        """Mark the grocery requirement of every plan using an edited recipe for rebuild"""
+        try:
+            with transaction() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE meal_plans SET grocery_ready = FALSE
+                    WHERE grocery_ready AND id IN (
+                        SELECT meal_plan_id FROM meal_plan_items WHERE recipe_id = %s
+                    )
+                    """,
+                    (str(recipe["_id"]),)
+                )
+        except Exception as e:
+            logger.error(f"Error invalidating meal plan groceries: {e}")
+    
+    @staticmethod
+    def invalidate_all_groceries():
+        """Mark every plan's grocery requirement for rebuild, after a bulk recipe load"""
+        try:
+            with transaction() as cursor:
+                cursor.execute("UPDATE meal_plans SET grocery_ready = FALSE WHERE grocery_ready")
+                return cursor.rowcount
+        except Exception as e:
+            logger.error(f"Error invalidating meal plan groceries: {e}")
+            return None
+    
+    @staticmethod
+    def _add_requirements(requirements, ingredients, scale=1.0):
+        """
+        Add a recipe's ingredients to a requirement table
+        
+        Amounts are converted to the base unit of their dimension in one batch,
+        so "200 g" and "1 kg" of the same ingredient add up to one line.
+        
+        Args:
+            requirements (dict): Lines keyed by (ingredient name, dimension)
+            ingredients (list): Recipe ingredients with name, amount and unit
+            scale (float): Multiplier for every amount
+        """
+        dimensions, base_amounts = ingredients_to_base(ingredients, scale)
+        
+        for ingredient, dimension, amount in zip(ingredients, dimensions, base_amounts):
+            name = normalize_ingredient_name(ingredient.get('name'))
+            if not name:
+                continue
+            
+            key = (name, dimension)
+            line = requirements.get(key)
+            
+            if line is None:
+                # The first unit seen for an ingredient is the one it is shown in
+                requirements[key] = {
+                    'name': name,
+                    'unit': normalize_unit(ingredient.get('unit')),
+                    'amount': float(amount),
+                    'uses': 1
+                }
+            else:
+                line['amount'] += float(amount)
+                line['uses'] += 1
+    
+    @staticmethod
+    def _grocery_lines(requirements, user_inventory=None):
+        """
+        Turn a requirement table into a grocery list, minus what the user has
+        
+        Args:
+            requirements (dict): Lines keyed by (ingredient name, dimension), amounts in base units
+            user_inventory (list, optional): List of inventory items
+            
+        Returns:
+            list: Ingredients still needed, sorted by name
+        """
+        remaining = {key: line['amount'] for key, line in requirements.items()}
+        covered = set()
+        
+        # Subtract what the user already has in inventory, in any compatible unit
+        for item in user_inventory or []:
+            dimension, amount = to_base(item.quantity, item.unit)
+            key = (normalize_ingredient_name(item.ingredient_name), dimension)
+            
+            if key in remaining:
+                remaining[key] -= amount
+                covered.add(key)
+        
+        grocery_list = []
+        for key, amount in remaining.items():
+            line = requirements[key]
+            
+            # Round amounts to 2 decimal places for readability
+            amount = round(from_base(amount, line['unit']), 2)
+            
+            # Zero-amount ("to taste") lines stay unless the pantry has the ingredient
+            if amount <= 0 and key in covered:
+                continue
+            
+            grocery_list.append({
+                'name': line['name'],
+                'amount': amount,
+                'unit': line['unit']
+            })
+        
+        # Sort by name
+        grocery_list.sort(key=lambda x: x['name'])
+        
+        return grocery_list
     
     def get_grocery_list(self, user_inventory=None):
         """
@@ -270,63 +961,20 @@ class MealPlan:
             list: List of ingredients needed for the meal plan
         """
         # Get all ingredients from recipes in the meal plan
-        all_ingredients = {}
+        requirements = {}
         
         for item in self.items:
             recipe = item.get('recipe')
             if not recipe:
                 continue
             
-            for ingredient in recipe.get('ingredients', []):
-                name = ingredient.get('name', '').lower()
-                amount = float(ingredient.get('amount', 0))
-                unit = ingredient.get('unit', '')
-                
-                if name in all_ingredients:
-                    # If the ingredient already exists, add the amount
-                    if all_ingredients[name]['unit'] == unit:
-                        all_ingredients[name]['amount'] += amount
-                    else:
-                        # If units don't match, keep them separate with a note
-                        alt_key = f"{name} ({unit})"
-                        if alt_key in all_ingredients:
-                            all_ingredients[alt_key]['amount'] += amount
-                        else:
-                            all_ingredients[alt_key] = {
-                                'name': name,
-                                'amount': amount,
-                                'unit': unit
-                            }
-                else:
-                    all_ingredients[name] = {
-                        'name': name,
-                        'amount': amount,
-                        'unit': unit
-                    }
-        
-        # Subtract what the user already has in inventory
-        if user_inventory:
-            for item in user_inventory:
-                name = item.ingredient_name.lower()
-                if name in all_ingredients:
-                    # If the units match, subtract the quantity
-                    if all_ingredients[name]['unit'] == item.unit:
-                        all_ingredients[name]['amount'] -= float(item.quantity)
-                        
-                        # If the amount is now zero or negative, remove the ingredient
-                        if all_ingredients[name]['amount'] <= 0:
-                            del all_ingredients[name]
-                    # If units don't match, we can't subtract accurately
-                    # So we leave it in the grocery list
-        
-        # Convert dictionary to list
-        grocery_list = list(all_ingredients.values())
-        
-        # Round amounts to 2 decimal places for readability
-        for item in grocery_list:
-            item['amount'] = round(item['amount'], 2)
+            MealPlan._add_requirements(requirements, recipe.get('ingredients', []))
         
-        # Sort by name
-        grocery_list.sort(key=lambda x: x['name'])
-        
-        return grocery_list
+        return MealPlan._grocery_lines(requirements, user_inventory)
+
+# Recipe edits change the contribution of every plan that uses the recipe
+Recipe.on_change(MealPlan.invalidate_grocery_for_recipe)
+
+# Rebuild the plan generator's matrices before the next generation
+Recipe.on_change(plan_generator.mark_stale)
+recipe_version.on_reload(plan_generator.mark_stale)
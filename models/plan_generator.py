@@ -0,0 +1,264 @@
+import threading
+from datetime import date
+import numpy as np
+from scipy import sparse
+from config import Config
+from models.cook_index import CookIndex, cook_index
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Dietary preference columns of user_preferences, matched against recipes' dietary_info
+DIETARY_KEYS = ('vegetarian', 'vegan', 'gluten_free', 'dairy_free')
+
+# Value of using up an item that expires today; later expiry dates count for less
+EXPIRING_WEIGHT = 3.0
+
+class PlanGenerator:
+    """
+    Greedy week planner over the recipe x ingredient incidence matrix
+
+    Slots are filled one at a time with the recipe that uses the most
+    soon-to-expire items while adding the fewest ingredients that are
+    neither in the pantry nor already bought for an earlier pick. Each step
+    scores every allowed recipe with two sparse matrix-vector products, so a
+    week over tens of thousands of recipes takes milliseconds.
+
+    The matrix is built from a snapshot of the shared cook index, whose
+    vocabulary also resolves pantry names, so only dietary flags and meal
+    type tags are read from MongoDB; they are precomputed as boolean arrays
+    aligned with the matrix rows. The matrices are (re)built in a background
+    thread; generation always uses the last completed build.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._building = False
+        self._build_done = threading.Event()
+        self.built = False
+        self.stale = False
+        self.index = None
+        self.incidence = None
+        self.recipe_ids = []
+        self.positions = {}
+        self.sizes = None
+        self.dietary = {}
+        self.meal_type_tags = {}
+
+    def build(self):
+        """Build over the shared cook index, reading dietary info and tags from MongoDB"""
+        from database.mongo_setup import mongo_db
+
+        try:
+            snapshot = cook_index.snapshot()
+            recipes = list(mongo_db.recipes.find({}, {"dietary_info": 1, "tags": 1}))
+        except Exception as e:
+            logger.error(f"Error building plan generator: {e}")
+            return False
+
+        self._build(snapshot, recipes)
+        return True
+
+    def build_from_recipes(self, recipes):
+        """Replace the generator's matrices with the given recipe documents, without the shared index"""
+        index = CookIndex()
+        index.build_from_recipes(recipes)
+        self._build(index.snapshot(), recipes)
+
+    def _build(self, index, recipes):
+        """Build the matrices from a CookIndexSnapshot and recipe dietary info and tags"""
+        lengths = np.fromiter((len(ids) for ids in index.recipe_ingredients), dtype=np.int64,
+                              count=len(index.recipe_ingredients))
+        indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.concatenate(
+            [np.frombuffer(ids, dtype=np.int32) for ids in index.recipe_ingredients]
+            or [np.zeros(0, dtype=np.int32)]
+        )
+        incidence = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float32), indices, indptr),
+            shape=(len(lengths), index.ingredient_count)
+        )
+
+        positions = {recipe_id: position for position, recipe_id in enumerate(index.recipe_ids)}
+        count = len(positions)
+
+        dietary = {key: np.zeros(count, dtype=bool) for key in DIETARY_KEYS}
+        meal_type_tags = {meal_type: np.zeros(count, dtype=bool) for meal_type, _ in Config.MEAL_TYPES}
+
+        for recipe in recipes:
+            position = positions.get(str(recipe["_id"]))
+            if position is None:
+                continue
+
+            dietary_info = recipe.get("dietary_info") or {}
+            for key in DIETARY_KEYS:
+                dietary[key][position] = bool(dietary_info.get(key))
+
+            tags = {str(tag).lower() for tag in recipe.get("tags") or []}
+            for meal_type in meal_type_tags:
+                meal_type_tags[meal_type][position] = meal_type in tags
+
+        # Swap in the new structures at once so running generations are unaffected
+        with self._lock:
+            self.index = index
+            self.incidence = incidence
+            self.recipe_ids = index.recipe_ids
+            self.positions = positions
+            self.sizes = np.asarray(incidence.sum(axis=1)).ravel()
+            self.dietary = dietary
+            self.meal_type_tags = meal_type_tags
+            self.built = True
+
+        logger.info(f"Built plan generator over {count} recipes")
+
+    def mark_stale(self, recipe=None):
+        """Rebuild in the background after a recipe was written"""
+        self.stale = True
+        self.build_in_background()
+
+    def build_in_background(self):
+        """
+        Start a background build unless one is already running
+
+        Returns:
+            threading.Event: Set when the running build finishes
+        """
+        with self._build_lock:
+            if not self._building:
+                self._building = True
+                self._build_done = threading.Event()
+                threading.Thread(target=self._run_builds, name="plan-generator-build", daemon=True).start()
+            return self._build_done
+
+    def _run_builds(self):
+        """Build until no recipe was written during the last build"""
+        while True:
+            self.stale = False
+            built = self.build()
+            if not built:
+                # Leave it stale so the next generation retries
+                self.stale = True
+
+            with self._build_lock:
+                if not built or not self.stale:
+                    self._building = False
+                    self._build_done.set()
+                    return
+
+    def _allowed(self, preferences, exclude_recipe_ids):
+        """Boolean mask of recipes matching the user's dietary preferences"""
+        allowed = self.sizes > 0
+
+        for key in DIETARY_KEYS:
+            if (preferences or {}).get(key):
+                allowed &= self.dietary[key]
+
+        for recipe_id in exclude_recipe_ids or ():
+            position = self.positions.get(str(recipe_id))
+            if position is not None:
+                allowed[position] = False
+
+        return allowed
+
+    def _expiring_weights(self, expiring_items, today):
+        """Per-ingredient value of using each expiring item, highest for the most urgent"""
+        weights = np.zeros(self.incidence.shape[1], dtype=np.float32)
+
+        for name, expiry_date in expiring_items:
+            days_left = max((expiry_date - today).days, 0)
+            weight = EXPIRING_WEIGHT / (1 + days_left)
+
+            for ingredient_id in self.index.resolve([name]):
+                if ingredient_id < weights.shape[0]:
+                    weights[ingredient_id] = max(weights[ingredient_id], weight)
+
+        return weights
+
+    def generate(self, slots, pantry_names=(), expiring_items=(), preferences=None,
+                 exclude_recipe_ids=(), today=None):
+        """
+        Pick a recipe for every slot
+
+        Args:
+            slots (list): (day_of_week, meal_type) pairs to fill, in order
+            pantry_names (iterable): Ingredient names the user has
+            expiring_items (iterable): (ingredient name, expiry date) pairs
+            preferences (dict, optional): Dietary preferences, e.g. {'vegan': True}
+            exclude_recipe_ids (iterable): Recipes not to pick, such as ones already planned
+            today (date, optional): Date expiry is measured from, defaults to today
+
+        Returns:
+            dict: 'items' with day_of_week, meal_type and recipe_id per filled slot,
+                and 'grocery_count', the number of ingredients to buy, or None
+                if the recipes have not finished loading
+        """
+        if not self.built or self.stale:
+            build_done = self.build_in_background()
+
+            # Only a worker's first generations wait; later ones use the last build
+            if not self.built:
+                build_done.wait(Config.PLAN_GENERATOR_BUILD_WAIT)
+                if not self.built:
+                    return None
+
+        # Hold the lock so a concurrent rebuild cannot swap the matrices mid-plan
+        with self._lock:
+            return self._generate(slots, pantry_names, expiring_items, preferences,
+                                  exclude_recipe_ids, today or date.today())
+
+    def _generate(self, slots, pantry_names, expiring_items, preferences, exclude_recipe_ids, today):
+        incidence = self.incidence
+        sizes = self.sizes
+        recipe_ids = self.recipe_ids
+        index = self.index
+
+        if not recipe_ids or not slots:
+            return {'items': [], 'grocery_count': 0}
+
+        allowed = self._allowed(preferences, exclude_recipe_ids)
+
+        # Ingredients the user has, or will have once the groceries are bought
+        have = np.zeros(incidence.shape[1], dtype=np.float32)
+        pantry_ids = [i for i in index.resolve(pantry_names) if i < have.shape[0]]
+        have[pantry_ids] = 1.0
+
+        expiring = self._expiring_weights(expiring_items, today)
+        grocery_count = 0
+        items = []
+
+        for day_of_week, meal_type in slots:
+            candidates = allowed
+            tagged = self.meal_type_tags.get(meal_type)
+            if tagged is not None and (tagged & allowed).any():
+                candidates = tagged & allowed
+
+            if not candidates.any():
+                break
+
+            missing = incidence @ (1.0 - have)
+            uses = incidence @ expiring
+
+            # Ties go to the recipe the user can already cook most of
+            scores = uses - missing + 0.01 * (sizes - missing) / np.maximum(sizes, 1)
+            scores[~candidates] = -np.inf
+
+            position = int(np.argmax(scores))
+            ingredient_ids = incidence.indices[incidence.indptr[position]:incidence.indptr[position + 1]]
+
+            grocery_count += int(missing[position])
+            have[ingredient_ids] = 1.0
+            expiring[ingredient_ids] = 0.0
+            allowed[position] = False
+
+            items.append({
+                'day_of_week': day_of_week,
+                'meal_type': meal_type,
+                'recipe_id': recipe_ids[position]
+            })
+
+        return {'items': items, 'grocery_count': grocery_count}
+
+# Shared generator for this worker process, built in the background on first use
+plan_generator = PlanGenerator()
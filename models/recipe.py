@@ -1,23 +1,95 @@
 from database.mongo_setup import mongo_db
 from bson.objectid import ObjectId
 import os
-import re
 from flask import current_app
+from config import Config
+from database.cache import create_cache
+from models.ingredient import Ingredient
+from models.ingredient_index import ingredient_index
+from models.cook_index import cook_index
+from models.recipe_images import image_manifest
+from models.recipe_version import recipe_version
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Fields needed to render a recipe card
+RECIPE_CARD_PROJECTION = {
+    "name": 1,
+    "description": 1,
+    "prep_time": 1,
+    "cook_time": 1,
+    "difficulty": 1,
+    "tags": 1,
+    "dietary_info": 1,
+    "image_url": 1
+}
+
+# Fields needed to render a meal plan and build its grocery list
+MEAL_PLAN_RECIPE_PROJECTION = dict(RECIPE_CARD_PROJECTION, ingredients=1, servings=1)
+
+# Recipe documents keyed by ObjectId
+recipe_cache = create_cache('recipes', Config.RECIPE_CACHE_SIZE, Config.RECIPE_CACHE_TTL)
+
+# Ranked recipe IDs keyed by normalized search query
+search_cache = create_cache('recipe_search', Config.SEARCH_CACHE_SIZE, Config.SEARCH_CACHE_TTL)
+
+# Callbacks run in the writing worker after a recipe is written, used to keep
+# in-memory indexes in sync; other workers reload through recipe_version
+_change_listeners = []
+
 class Recipe:
+    @staticmethod
+    def on_change(listener):
+        """Register a callback that receives each recipe document after it is written"""
+        _change_listeners.append(listener)
+        return listener
+    
+    @staticmethod
+    def notify_changed(recipe):
+        """Run the change callbacks for a written recipe"""
+        for listener in _change_listeners:
+            try:
+                listener(recipe)
+            except Exception as e:
+                logger.error(f"Error in recipe change listener: {e}")
+    
+    @staticmethod
+    def save(recipe):
+        """
+        Insert or replace a recipe document
+        
+        Every recipe write must go through here, so the change listeners run
+        and the shared recipes version tells the other workers to reload.
+        
+        Args:
+            recipe (dict): Recipe document, with or without an _id
+            
+        Returns:
+            str: ID of the saved recipe or None on error
+        """
+        try:
+            if recipe.get("_id"):
+                mongo_db.recipes.replace_one({"_id": recipe["_id"]}, recipe, upsert=True)
+            else:
+                recipe["_id"] = mongo_db.recipes.insert_one(recipe).inserted_id
+            
+            recipe_version.bump()
+            Recipe.notify_changed(recipe)
+            return str(recipe["_id"])
+        except Exception as e:
+            logger.error(f"Error saving recipe: {e}")
+            return None
+    
     @staticmethod
     def get_image_path(recipe_id, image_url=None):
         """Return the local path to a recipe image or use placeholder if it doesn't exist"""
         try:
             # First try using recipe ID-based filename
-            local_path = f"images/recipes/{recipe_id}.jpg"
-            full_path = os.path.join(current_app.static_folder, local_path)
+            images_dir = os.path.join(current_app.static_folder, "images", "recipes")
             
-            if os.path.exists(full_path):
-                return f"/static/{local_path}"
+            if image_manifest.has_image(images_dir, recipe_id):
+                return f"/static/images/recipes/{recipe_id}.jpg"
             
             # If image_url is provided, use it as fallback
             if image_url:
@@ -30,29 +102,170 @@ class Recipe:
             return "/static/images/placeholder.jpg"
         
     @staticmethod
-    def get_all():
+    def build_filter_query(dietary_filters=None, max_time=None, difficulty=None):
+        """
+        Build a MongoDB query for the dietary, time and difficulty filters
+        
+        Args:
+            dietary_filters (dict, optional): Dictionary of dietary filters
+            max_time (int, optional): Maximum total time in minutes
+            difficulty (str, optional): Difficulty level ('Easy', 'Medium', 'Hard')
+            
+        Returns:
+            dict: MongoDB query document
+        """
+        query = {}
+        
+        for key, value in (dietary_filters or {}).items():
+            if value:
+                query[f"dietary_info.{key}"] = True
+        
+        if max_time:
+            query["$expr"] = {
+                "$lte": [
+                    {"$add": [{"$ifNull": ["$prep_time", 0]}, {"$ifNull": ["$cook_time", 0]}]},
+                    max_time
+                ]
+            }
+        
+        if difficulty:
+            query["difficulty"] = difficulty
+        
+        return query
+    
+    @staticmethod
+    def get_page(dietary_filters=None, max_time=None, difficulty=None, after=None, per_page=None):
+        """
+        Get one page of recipe cards using keyset pagination on _id
+        
+        Args:
+            dietary_filters (dict, optional): Dictionary of dietary filters
+            max_time (int, optional): Maximum total time in minutes
+            difficulty (str, optional): Difficulty level
+            after (str, optional): ID of the last recipe on the previous page
+            per_page (int, optional): Page size, defaults to Config.RECIPES_PER_PAGE
+            
+        Returns:
+            tuple: (list of recipe cards, ID to pass as `after` for the next page or None)
+        """
+        per_page = per_page or Config.RECIPES_PER_PAGE
+        
+        try:
+            query = Recipe.build_filter_query(dietary_filters, max_time, difficulty)
+            
+            if after:
+                query["_id"] = {"$gt": ObjectId(after)}
+            
+            # Fetch one extra card to know whether another page exists
+            recipes = list(
+                mongo_db.recipes.find(query, RECIPE_CARD_PROJECTION)
+                .sort("_id", 1)
+                .limit(per_page + 1)
+            )
+            
+            next_after = None
+            if len(recipes) > per_page:
+                recipes = recipes[:per_page]
+                next_after = str(recipes[-1]["_id"])
+            
+            return recipes, next_after
+        except Exception as e:
+            logger.error(f"Error getting recipe page: {e}")
+            return [], None
+    
+    @staticmethod
+    def _apply_projection(recipe, projection):
+        """Return a copy of a cached recipe, limited to the projected fields"""
+        if not projection:
+            return dict(recipe)
+        
+        return {
+            key: value for key, value in recipe.items()
+            if key == "_id" or projection.get(key)
+        }
+    
+    @staticmethod
+    def invalidate(recipe_id):
+        """Drop a recipe from the document cache"""
         try:
-            return list(mongo_db.recipes.find())
+            recipe_cache.invalidate(ObjectId(recipe_id))
         except Exception as e:
-            logger.error(f"Error getting all recipes: {e}")
-            return []
+            logger.warning(f"Invalid recipe ID for cache invalidation: {e}")
     
     @staticmethod
     def get_by_id(recipe_id):
         try:
-            return mongo_db.recipes.find_one({"_id": ObjectId(recipe_id)})
+            object_id = ObjectId(recipe_id)
+            
+            recipe = recipe_cache.get(object_id)
+            if recipe is None:
+                recipe = mongo_db.recipes.find_one({"_id": object_id})
+                
+                if recipe is None:
+                    return None
+                
+                recipe_cache.set(object_id, recipe)
+            
+            # Hand out a copy so callers can decorate it without touching the cache
+            return dict(recipe)
         except Exception as e:
             logger.error(f"Error getting recipe by ID: {e}")
             return None
     
     @staticmethod
-    def search_by_ingredients(ingredients_list, exclude_ingredients=None):
+    def get_by_ids(recipe_ids, projection=None):
+        """
+        Get many recipes, querying MongoDB once for the ones not in the cache
+        
+        Args:
+            recipe_ids (iterable): Recipe IDs as strings or ObjectIds
+            projection (dict, optional): Fields to return
+            
+        Returns:
+            dict: Recipes keyed by their string ID; unknown or invalid IDs are left out
+        """
+        object_ids = set()
+        for recipe_id in recipe_ids:
+            try:
+                object_ids.add(ObjectId(recipe_id))
+            except Exception:
+                logger.warning(f"Invalid recipe ID: {recipe_id}")
+        
+        if not object_ids:
+            return {}
+        
+        recipes = {}
+        missing = []
+        for object_id in object_ids:
+            recipe = recipe_cache.get(object_id)
+            if recipe is None:
+                missing.append(object_id)
+            else:
+                recipes[str(object_id)] = Recipe._apply_projection(recipe, projection)
+        
+        if not missing:
+            return recipes
+        
+        try:
+            # Fetch whole documents so they can be cached for every caller
+            for recipe in mongo_db.recipes.find({"_id": {"$in": missing}}):
+                recipe_cache.set(recipe["_id"], recipe)
+                recipes[str(recipe["_id"])] = Recipe._apply_projection(recipe, projection)
+            
+            return recipes
+        except Exception as e:
+            logger.error(f"Error getting recipes by IDs: {e}")
+            return recipes
+    
+    @staticmethod
+    def search_by_ingredients(ingredients_list, exclude_ingredients=None, limit=None):
         """
         Search for recipes that can be made with the given ingredients
         
         Args:
             ingredients_list (list): List of ingredients names
             exclude_ingredients (list, optional): List of ingredients to exclude
+            limit (int, optional): Maximum number of recipes, all matches when None
             
         Returns:
             list: List of recipes that can be made with the given ingredients
@@ -61,51 +274,45 @@ class Recipe:
             return []
         
         try:
-            # Normalize ingredient names to lowercase for case-insensitive matching
-            ingredients_list = [name.lower() for name in ingredients_list]
-            
-            # Create regex patterns for partial matching
-            ingredient_patterns = [
-                {"ingredients.name": {"$regex": f"^{re.escape(ingredient)}", "$options": "i"}}
-                for ingredient in ingredients_list
-            ]
-            
-            # Create query to match recipes with ingredients from the list
-            query = {"$or": ingredient_patterns}
-            
-            # Add exclusion if provided
-            if exclude_ingredients:
-                exclude_ingredients = [name.lower() for name in exclude_ingredients]
-                exclude_patterns = [
-                    {"ingredients.name": {"$regex": f"^{re.escape(ingredient)}", "$options": "i"}}
-                    for ingredient in exclude_ingredients
-                ]
-                query["$nor"] = exclude_patterns
+            # Rank recipes by coverage using the in-memory inverted index
+            ranked = cook_index.top_k(ingredients_list, k=limit, exclude_names=exclude_ingredients)
             
-            # Find recipes and calculate match percentage
-            recipes = list(mongo_db.recipes.find(query))
-            
-            # Calculate match percentage for each recipe
-            for recipe in recipes:
-                total_ingredients = len(recipe["ingredients"])
-                matching_ingredients = 0
-                
-                # Count matching ingredients with case-insensitive comparison
-                for recipe_ingredient in recipe["ingredients"]:
-                    ingredient_name = recipe_ingredient["name"].lower()
-                    if any(ingredient_name.startswith(user_ingredient) for user_ingredient in ingredients_list):
-                        matching_ingredients += 1
-                
-                recipe["match_percentage"] = (matching_ingredients / total_ingredients) * 100
+            # Fetch the ranked recipes with one query
+            recipes_by_id = Recipe.get_by_ids(recipe_id for recipe_id, _ in ranked)
             
-            # Sort by match percentage (highest first)
-            recipes.sort(key=lambda x: x.get("match_percentage", 0), reverse=True)
+            recipes = []
+            for recipe_id, coverage in ranked:
+                recipe = recipes_by_id.get(recipe_id)
+                if recipe:
+                    recipe["match_percentage"] = coverage * 100
+                    recipes.append(recipe)
             
             return recipes
         except Exception as e:
             logger.error(f"Error searching recipes by ingredients: {e}")
             return []
     
+    @staticmethod
+    def what_can_i_cook(user_id, limit=20):
+        """
+        Get the recipes best covered by a user's whole inventory
+        
+        Args:
+            user_id (int): User ID
+            limit (int): Maximum number of recipes
+            
+        Returns:
+            list: Recipes with a match_percentage, best match first
+        """
+        from models.inventory import Inventory
+        
+        inventory_items = Inventory.get_pantry(user_id)
+        
+        return Recipe.search_by_ingredients(
+            [item.ingredient_name for item in inventory_items],
+            limit=limit
+        )
+    
     @staticmethod
     def filter_by_dietary(recipes, dietary_filters):
         """
@@ -197,20 +404,34 @@ class Recipe:
         if not search_term:
             return []
         
+        query = " ".join(search_term.lower().split())
+        if not query:
+            return []
+        
         try:
-            # Create text index if it doesn't exist
-            if "name_text" not in mongo_db.recipes.index_information():
-                mongo_db.recipes.create_index([
-                    ("name", "text"), 
-                    ("description", "text"),
-                    ("ingredients.name", "text")
-                ])
-            
-            # Use text search with case insensitivity
-            return list(mongo_db.recipes.find(
-                {"$text": {"$search": search_term}},
-                {"score": {"$meta": "textScore"}}
-            ).sort([("score", {"$meta": "textScore"})]))
+            # Ranked (id, score) pairs for popular searches are served from memory
+            ranked = search_cache.get(query)
+            
+            if ranked is None:
+                ranked = [
+                    (str(result["_id"]), result["score"])
+                    for result in mongo_db.recipes.find(
+                        {"$text": {"$search": query}},
+                        {"_id": 1, "score": {"$meta": "textScore"}}
+                    ).sort([("score", {"$meta": "textScore"})])
+                ]
+                search_cache.set(query, ranked)
+            
+            recipes_by_id = Recipe.get_by_ids(recipe_id for recipe_id, _ in ranked)
+            
+            recipes = []
+            for recipe_id, score in ranked:
+                recipe = recipes_by_id.get(recipe_id)
+                if recipe:
+                    recipe["score"] = score
+                    recipes.append(recipe)
+            
+            return recipes
         except Exception as e:
             logger.error(f"Error searching recipes by name: {e}")
             return []
@@ -247,22 +468,7 @@ class Recipe:
             return []
         
         try:
-            # Normalize query to lowercase
-            query = query.lower()
-            
-            # Aggregate unique ingredient names that match the query
-            pipeline = [
-                {"$unwind": "$ingredients"},
-                {"$match": {"ingredients.name": {"$regex": f"^{re.escape(query)}", "$options": "i"}}},
-                {"$group": {"_id": "$ingredients.name"}},
-                {"$sort": {"_id": 1}},
-                {"$limit": 10}
-            ]
-            
-            results = mongo_db.recipes.aggregate(pipeline)
-            
-            # Return a list of ingredient names
-            return [result["_id"] for result in results]
+            return ingredient_index.suggest(query, limit=10)
         except Exception as e:
             logger.error(f"Error getting ingredient suggestions: {e}")
             return []
@@ -270,7 +476,11 @@ class Recipe:
     @staticmethod
     def mark_recipe_completed(user_id, recipe_id, servings=1):
         """
-        Mark a recipe as completed by a user
+        Mark a recipe as completed by a user and deduct its ingredients
+        
+        The completion row and the inventory deduction are written in one
+        transaction. Ingredient amounts are scaled by servings made over the
+        recipe's own servings.
         
         Args:
             user_id (int): User ID
@@ -280,27 +490,38 @@ class Recipe:
         Returns:
             bool: True if successful, False otherwise
         """
-        from database.mysql_setup import get_connection
+        from database.mysql_setup import transaction
+        from models.inventory import Inventory
         
-        conn = get_connection()
-        cursor = conn.cursor()
+        recipe = Recipe.get_by_id(recipe_id)
+        if not recipe:
+            return False
         
         try:
-            cursor.execute(
-                """
-                INSERT INTO completed_recipes 
-                (user_id, recipe_id, servings_made) 
-                VALUES (%s, %s, %s)
-                """,
-                (user_id, recipe_id, servings)
-            )
+            scale = float(servings) / float(recipe.get("servings") or 1)
+        except (TypeError, ValueError, ZeroDivisionError):
+            scale = 1.0
+        
+        try:
+            with transaction() as cursor:
+                shortfalls = Inventory.deduct_ingredients(
+                    cursor, user_id, recipe.get("ingredients", []), scale
+                )
+                
+                cursor.execute(
+                    """
+                    INSERT INTO completed_recipes 
+                    (user_id, recipe_id, servings_made) 
+                    VALUES (%s, %s, %s)
+                    """,
+                    (user_id, recipe_id, servings)
+                )
+            
+            if shortfalls:
+                logger.info(f"Inventory did not cover {', '.join(shortfalls)} for recipe {recipe_id}")
             
-            conn.commit()
-            cursor.close()
             return True
         except Exception as e:
-            conn.rollback()
-            cursor.close()
             logger.error(f"Error marking recipe as completed: {e}")
             return False
     
@@ -315,30 +536,51 @@ class Recipe:
         Returns:
             list: List of completed recipes with recipe details
         """
-        from database.mysql_setup import get_connection
-        
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
+        from database.mysql_setup import db_cursor
         
         try:
-            cursor.execute(
-                """
-                SELECT * FROM completed_recipes 
-                WHERE user_id = %s 
-                ORDER BY completed_date DESC
-                """,
-                (user_id,)
-            )
-            
-            completed = cursor.fetchall()
-            cursor.close()
+            with db_cursor(dictionary=True) as cursor:
+                cursor.execute(
+                    """
+                    SELECT * FROM completed_recipes 
+                    WHERE user_id = %s 
+                    ORDER BY completed_date DESC
+                    """,
+                    (user_id,)
+                )
+                
+                completed = cursor.fetchall()
             
-            # Fetch recipe details for each completed recipe
+            # Fetch recipe details for all completed recipes at once
+            recipes = Recipe.get_by_ids(
+                (item['recipe_id'] for item in completed),
+                RECIPE_CARD_PROJECTION
+            )
             for item in completed:
-                item['recipe'] = Recipe.get_by_id(item['recipe_id'])
+                item['recipe'] = recipes.get(item['recipe_id'])
             
             return completed
         except Exception as e:
-            cursor.close()
             logger.error(f"Error getting completed recipes: {e}")
             return []
+
+# Drop cached copies of recipes when they are written
+Recipe.on_change(lambda recipe: Recipe.invalidate(recipe["_id"]))
+
+# Any recipe write can change search rankings
+Recipe.on_change(lambda recipe: search_cache.clear())
+
+# Keep the ingredient autocomplete index in sync with recipe writes
+Recipe.on_change(ingredient_index.add_recipe)
+
+# Keep the "what can I cook" index in sync with recipe writes
+Recipe.on_change(cook_index.add_recipe)
+
+# Keep the ingredient catalog in sync with recipe writes
+Recipe.on_change(Ingredient.sync_recipe)
+
+# Recipes written by other workers: drop cached copies and reload the indexes
+recipe_version.on_reload(recipe_cache.clear)
+recipe_version.on_reload(search_cache.clear)
+recipe_version.on_reload(ingredient_index.refresh)
+recipe_version.on_reload(cook_index.refresh)
@@ -0,0 +1,97 @@
+import os
+import signal
+import threading
+import time
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ImageManifest:
+    """
+    Per-worker set of recipe IDs that have a local image
+
+    The images directory is listed once and recipe cards are checked with a
+    set lookup. The directory mtime is re-checked at most once every
+    `check_interval` seconds, and a reload can be forced with a signal, so
+    new images show up without a stat call per recipe card.
+    """
+
+    def __init__(self, check_interval=30):
+        self.check_interval = check_interval
+        self.directory = None
+        self._recipe_ids = frozenset()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._reload_requested = False
+        self._lock = threading.Lock()
+
+    def load(self, directory):
+        """List the images directory and replace the manifest"""
+        recipe_ids = set()
+        mtime = None
+
+        try:
+            mtime = os.stat(directory).st_mtime
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    name, extension = os.path.splitext(entry.name)
+                    if extension == ".jpg" and entry.is_file():
+                        recipe_ids.add(name)
+        except FileNotFoundError:
+            logger.warning(f"Recipe images directory not found: {directory}")
+        except Exception as e:
+            logger.error(f"Error loading recipe image manifest: {e}")
+
+        self.directory = directory
+        self._recipe_ids = frozenset(recipe_ids)
+        self._mtime = mtime
+        self._checked_at = time.monotonic()
+        self._reload_requested = False
+
+        logger.info(f"Loaded recipe image manifest with {len(recipe_ids)} images")
+
+    def request_reload(self, *args):
+        """Ask for the manifest to be reloaded on the next lookup (usable as a signal handler)"""
+        self._reload_requested = True
+
+    def _refresh(self, directory):
+        """Reload the manifest if it is missing, requested, or the directory changed"""
+        now = time.monotonic()
+
+        if (self.directory == directory and not self._reload_requested
+                and now - self._checked_at < self.check_interval):
+            return
+
+        with self._lock:
+            if self.directory != directory or self._reload_requested:
+                self.load(directory)
+                return
+
+            if now - self._checked_at < self.check_interval:
+                return
+
+            self._checked_at = now
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError:
+                mtime = None
+
+            if mtime != self._mtime:
+                self.load(directory)
+
+    def has_image(self, directory, recipe_id):
+        """Check whether `<recipe_id>.jpg` exists in the images directory"""
+        self._refresh(directory)
+        return str(recipe_id) in self._recipe_ids
+
+    def install_signal_handler(self, signum=signal.SIGUSR2):
+        """Reload the manifest when the worker receives `signum`"""
+        try:
+            signal.signal(signum, self.request_reload)
+        except ValueError:
+            # Signal handlers can only be installed from the main thread
+            logger.warning("Could not install recipe image manifest signal handler")
+
+# Shared manifest for this worker process
+image_manifest = ImageManifest(check_interval=Config.IMAGE_MANIFEST_CHECK_INTERVAL)
@@ -0,0 +1,121 @@
+import threading
+import time
+from flask.cli import AppGroup
+from pymongo import ReturnDocument
+import click
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Document of the `versions` collection holding the recipes counter
+RECIPES_VERSION_ID = "recipes"
+
+class RecipeVersion:
+    """
+    Shared recipes version counter, watched by every worker
+
+    Every recipe write bumps a counter document in MongoDB. Workers read it
+    at most once every `check_interval` seconds, and when it moved since the
+    last check they run the reload listeners in a background thread, so
+    per-worker caches and indexes catch up with writes made by other workers
+    or outside the app. The writing worker updates its own structures through
+    Recipe.on_change and does not reload for its own bump.
+    """
+
+    def __init__(self, check_interval=15):
+        self.check_interval = check_interval
+        self.version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def on_reload(self, listener):
+        """Register a callback run when recipes were written by another process"""
+        self._listeners.append(listener)
+        return listener
+
+    def _read(self):
+        from database.mongo_setup import mongo_db
+
+        document = mongo_db.versions.find_one({"_id": RECIPES_VERSION_ID}, {"version": 1})
+        return document.get("version", 0) if document else 0
+
+    def bump(self):
+        """
+        Record a recipe write for every worker
+
+        Returns:
+            int: New version, or None on error
+        """
+        from database.mongo_setup import mongo_db
+
+        try:
+            document = mongo_db.versions.find_one_and_update(
+                {"_id": RECIPES_VERSION_ID},
+                {"$inc": {"version": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            logger.error(f"Error bumping recipes version: {e}")
+            return None
+
+        version = document["version"]
+
+        # Skip our own write, but not ones other processes made in between
+        with self._lock:
+            if self.version == version - 1:
+                self.version = version
+
+        return version
+
+    def check(self):
+        """Run the reload listeners if recipes changed since the last check"""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+
+            try:
+                version = self._read()
+            except Exception as e:
+                logger.error(f"Error checking recipes version: {e}")
+                return
+
+            previous = self.version
+            self.version = version
+
+        # The first check only records the version; nothing was loaded before it
+        if previous is not None and version != previous:
+            logger.info(f"Recipes changed (version {previous} -> {version}), reloading")
+            threading.Thread(target=self._reload, name="recipe-reload", daemon=True).start()
+
+    def _reload(self):
+        for listener in self._listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"Error in recipe reload listener: {e}")
+
+# Shared watcher for this worker process
+recipe_version = RecipeVersion(check_interval=Config.RECIPE_VERSION_CHECK_INTERVAL)
+
+recipes_cli = AppGroup("recipes", help="Recipe data maintenance")
+
+@recipes_cli.command("changed")
+def recipes_changed_command():
+    """Propagate recipes written outside the app, e.g. by mongoimport"""
+    from models.ingredient import Ingredient
+    from models.meal_plan import MealPlan
+
+    added = Ingredient.rebuild_catalog()
+    MealPlan.invalidate_all_groceries()
+    version = recipe_version.bump()
+
+    click.echo(f"Ingredient catalog: {added} added")
+    click.echo(f"Recipes version: {version}")
@@ -0,0 +1,117 @@
+import numpy as np
+from config import Config
+
+# Dimension and factor to the base unit (g, ml or count) for every unit in
+# Config.INGREDIENT_UNITS. Slices, bunches and cloves have no fixed size, so
+# each is its own dimension and only adds up with itself.
+UNIT_FACTORS = {
+    'mg': ('mass', 0.001),
+    'g': ('mass', 1.0),
+    'kg': ('mass', 1000.0),
+    'oz': ('mass', 28.349523125),
+    'lb': ('mass', 453.59237),
+    'ml': ('volume', 1.0),
+    'l': ('volume', 1000.0),
+    'tsp': ('volume', 4.92892159375),
+    'tbsp': ('volume', 14.78676478125),
+    'cup': ('volume', 236.5882365),
+    'pint': ('volume', 473.176473),
+    'quart': ('volume', 946.352946),
+    'gallon': ('volume', 3785.411784),
+    'pinch': ('volume', 0.308057599609375),
+    'piece': ('count', 1.0),
+    'whole': ('count', 1.0),
+    'count': ('count', 1.0),
+    'slice': ('slice', 1.0),
+    'bunch': ('bunch', 1.0),
+    'clove': ('clove', 1.0),
+}
+
+# Spellings found in recipe data for the units above
+UNIT_ALIASES = {
+    'gram': 'g', 'grams': 'g',
+    'kilogram': 'kg', 'kilograms': 'kg',
+    'milligram': 'mg', 'milligrams': 'mg',
+    'ounce': 'oz', 'ounces': 'oz',
+    'pound': 'lb', 'pounds': 'lb', 'lbs': 'lb',
+    'milliliter': 'ml', 'milliliters': 'ml', 'millilitre': 'ml', 'millilitres': 'ml',
+    'liter': 'l', 'liters': 'l', 'litre': 'l', 'litres': 'l',
+    'teaspoon': 'tsp', 'teaspoons': 'tsp',
+    'tablespoon': 'tbsp', 'tablespoons': 'tbsp',
+    'cups': 'cup',
+    'pints': 'pint',
+    'quarts': 'quart',
+    'gallons': 'gallon',
+    'pinches': 'pinch',
+    'pieces': 'piece', 'pcs': 'piece',
+    'slices': 'slice',
+    'bunches': 'bunch',
+    'cloves': 'clove',
+}
+
+_missing_units = {unit for unit, _ in Config.INGREDIENT_UNITS} - set(UNIT_FACTORS)
+if _missing_units:
+    raise RuntimeError(f"No conversion factors for units: {', '.join(sorted(_missing_units))}")
+
+def normalize_unit(unit):
+    """Return the canonical unit name, or the cleaned-up input for unknown units"""
+    unit = (unit or '').strip().lower().rstrip('.')
+    return UNIT_ALIASES.get(unit, unit)
+
+def dimension_of(unit):
+    """Return the dimension of a unit; unknown units are their own dimension"""
+    unit = normalize_unit(unit)
+    return UNIT_FACTORS.get(unit, (unit, 1.0))[0]
+
+def to_base(amount, unit):
+    """
+    Convert an amount to the base unit of its dimension
+
+    Returns:
+        tuple: (dimension, amount in the base unit)
+    """
+    unit = normalize_unit(unit)
+    dimension, factor = UNIT_FACTORS.get(unit, (unit, 1.0))
+    return dimension, float(amount) * factor
+
+def from_base(amount, unit):
+    """Convert an amount in the base unit of `unit`'s dimension into `unit`"""
+    unit = normalize_unit(unit)
+    return float(amount) / UNIT_FACTORS.get(unit, (unit, 1.0))[1]
+
+def to_base_many(amounts, units):
+    """
+    Convert whole arrays of amounts to base units at once
+
+    Args:
+        amounts (sequence): Amounts
+        units (sequence): Unit for each amount
+
+    Returns:
+        tuple: (list of dimensions, ndarray of base amounts)
+    """
+    lookups = [UNIT_FACTORS.get(unit, (unit, 1.0)) for unit in map(normalize_unit, units)]
+    dimensions = [dimension for dimension, _ in lookups]
+    factors = np.fromiter((factor for _, factor in lookups), dtype=np.float64, count=len(lookups))
+    return dimensions, np.asarray(amounts, dtype=np.float64) * factors
+
+def ingredients_to_base(ingredients, scale=1.0):
+    """
+    Convert a recipe's ingredient list to base units in one batch
+
+    Args:
+        ingredients (list): Ingredients with amount and unit
+        scale (float): Multiplier for every amount
+
+    Returns:
+        tuple: (list of dimensions, ndarray of base amounts), in ingredient order
+    """
+    amounts = []
+    for ingredient in ingredients:
+        try:
+            amounts.append(float(ingredient.get('amount', 0) or 0))
+        except (TypeError, ValueError):
+            amounts.append(0.0)
+
+    dimensions, base_amounts = to_base_many(amounts, [ingredient.get('unit', '') for ingredient in ingredients])
+    return dimensions, base_amounts * scale
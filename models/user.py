@@ -1,6 +1,6 @@
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
-from database.mysql_setup import get_connection
+from database.mysql_setup import db_cursor, transaction
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,12 +20,9 @@ class User(UserMixin):
     
     @staticmethod
     def get_by_id(user_id):
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-        user = cursor.fetchone()
-        cursor.close()
+        with db_cursor(dictionary=True) as cursor:
+            cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
+            user = cursor.fetchone()
         
         if not user:
             return None
@@ -39,12 +36,9 @@ class User(UserMixin):
     
     @staticmethod
     def get_by_email(email):
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
-        user = cursor.fetchone()
-        cursor.close()
+        with db_cursor(dictionary=True) as cursor:
+            cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
+            user = cursor.fetchone()
         
         if not user:
             return None
@@ -58,12 +52,9 @@ class User(UserMixin):
     
     @staticmethod
     def get_by_username(username):
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-        user = cursor.fetchone()
-        cursor.close()
+        with db_cursor(dictionary=True) as cursor:
+            cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+            user = cursor.fetchone()
         
         if not user:
             return None
@@ -77,62 +68,47 @@ class User(UserMixin):
     
     @staticmethod
     def create(username, email, password):
-        conn = get_connection()
-        cursor = conn.cursor()
-        
         # Create user instance
         user = User(id=None, username=username, email=email)
         user.set_password(password)
         
         try:
-            # Insert user into database
-            cursor.execute(
-                "INSERT INTO users (username, email, password) VALUES (%s, %s, %s)",
-                (username, email, user.password_hash)
-            )
-            
-            user.id = cursor.lastrowid
-            
-            # Create default preferences for user
-            cursor.execute(
-                "INSERT INTO user_preferences (user_id) VALUES (%s)",
-                (user.id,)
-            )
-            
-            conn.commit()
-            cursor.close()
+            with transaction() as cursor:
+                # Insert user into database
+                cursor.execute(
+                    "INSERT INTO users (username, email, password) VALUES (%s, %s, %s)",
+                    (username, email, user.password_hash)
+                )
+                
+                user.id = cursor.lastrowid
+                
+                # Create default preferences for user
+                cursor.execute(
+                    "INSERT INTO user_preferences (user_id) VALUES (%s)",
+                    (user.id,)
+                )
             
             return user
         except Exception as e:
-            conn.rollback()
-            cursor.close()
             logger.error(f"Error creating user: {e}")
             return None
     
     def get_preferences(self):
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute(
-            "SELECT * FROM user_preferences WHERE user_id = %s",
-            (self.id,)
-        )
-        
-        prefs = cursor.fetchone()
-        cursor.close()
-        
-        # If no preferences exist, create default preferences
-        if not prefs:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
+        with db_cursor(dictionary=True) as cursor:
             cursor.execute(
-                "INSERT INTO user_preferences (user_id) VALUES (%s)",
+                "SELECT * FROM user_preferences WHERE user_id = %s",
                 (self.id,)
             )
             
-            conn.commit()
-            cursor.close()
+            prefs = cursor.fetchone()
+        
+        # If no preferences exist, create default preferences
+        if not prefs:
+            with transaction() as cursor:
+                cursor.execute(
+                    "INSERT INTO user_preferences (user_id) VALUES (%s)",
+                    (self.id,)
+                )
             
             return {
                 'vegetarian': False,
@@ -144,31 +120,24 @@ class User(UserMixin):
         return prefs
     
     def update_preferences(self, preferences):
-        conn = get_connection()
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute(
-                """
-                UPDATE user_preferences
-                SET vegetarian = %s, vegan = %s, gluten_free = %s, dairy_free = %s
-                WHERE user_id = %s
-                """,
-                (
-                    preferences.get('vegetarian', False),
-                    preferences.get('vegan', False),
-                    preferences.get('gluten_free', False),
-                    preferences.get('dairy_free', False),
-                    self.id
+            with transaction() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE user_preferences
+                    SET vegetarian = %s, vegan = %s, gluten_free = %s, dairy_free = %s
+                    WHERE user_id = %s
+                    """,
+                    (
+                        preferences.get('vegetarian', False),
+                        preferences.get('vegan', False),
+                        preferences.get('gluten_free', False),
+                        preferences.get('dairy_free', False),
+                        self.id
+                    )
                 )
-            )
-            
-            conn.commit()
-            cursor.close()
             
             return True
         except Exception as e:
-            conn.rollback()
-            cursor.close()
             logger.error(f"Error updating user preferences: {e}")
             return False
@@ -1,23 +1,131 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from models.inventory import Inventory
-from forms import InventoryForm
+from forms import InventoryForm, InventoryImportForm
 from config import Config
 from datetime import datetime, timedelta
+import csv
+import io
+import itertools
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
 inventory_bp = Blueprint('inventory', __name__)
 
+VALID_UNITS = {unit for unit, _ in Config.INGREDIENT_UNITS}
+VALID_CATEGORIES = {category for category, _ in Config.INGREDIENT_CATEGORIES}
+
+def _string_field(raw, *keys):
+    """
+    Stripped value of the first of `keys` that is set
+    
+    Returns:
+        str: The value, '' if none is set, or None if it is not a string
+    """
+    for key in keys:
+        value = raw.get(key)
+        if value not in (None, ''):
+            return value.strip() if isinstance(value, str) else None
+    
+    return ''
+
+def _parse_item(raw, require_all=True):
+    """
+    Validate one imported or edited item
+    
+    Returns:
+        tuple: (item dictionary, error message or None)
+    """
+    item = {}
+    
+    name = _string_field(raw, 'ingredient_name', 'name')
+    if name is None:
+        return None, "ingredient_name must be a string"
+    if name:
+        if len(name) > 100:
+            return None, f"name too long: {name[:20]}..."
+        item['ingredient_name'] = name
+    elif require_all:
+        return None, "missing ingredient_name"
+    
+    quantity = raw.get('quantity')
+    if quantity not in (None, ''):
+        try:
+            item['quantity'] = float(quantity)
+        except (TypeError, ValueError):
+            return None, f"invalid quantity for {name}: {quantity}"
+        if item['quantity'] <= 0:
+            return None, f"quantity must be positive for {name}"
+    elif require_all:
+        return None, f"missing quantity for {name}"
+    
+    unit = _string_field(raw, 'unit')
+    if unit is None:
+        return None, f"unit must be a string for {name}"
+    unit = unit.lower()
+    if unit:
+        if unit not in VALID_UNITS:
+            return None, f"unknown unit for {name}: {unit}"
+        item['unit'] = unit
+    elif require_all:
+        return None, f"missing unit for {name}"
+    
+    category = _string_field(raw, 'category')
+    if category is None:
+        return None, f"category must be a string for {name}"
+    category = category.lower()
+    if category:
+        if category not in VALID_CATEGORIES:
+            return None, f"unknown category for {name}: {category}"
+        item['category'] = category
+    
+    expiry_date = _string_field(raw, 'expiry_date')
+    if expiry_date is None:
+        return None, f"expiry_date must be a YYYY-MM-DD string for {name}"
+    if expiry_date:
+        try:
+            item['expiry_date'] = datetime.strptime(expiry_date, '%Y-%m-%d').date()
+        except ValueError:
+            return None, f"invalid expiry_date for {name}: {expiry_date}"
+    
+    return item, None
+
+def _parse_items(rows, require_all=True):
+    """Validate a list of raw items, returning (items, errors)"""
+    items = []
+    errors = []
+    
+    if len(rows) > Config.INVENTORY_BATCH_MAX_ROWS:
+        return items, [f"too many items: at most {Config.INVENTORY_BATCH_MAX_ROWS} per request"]
+    
+    for line, raw in enumerate(rows, start=1):
+        if not isinstance(raw, dict):
+            errors.append(f"item {line}: expected an object")
+            continue
+        
+        # Edits are matched to existing rows by ID
+        if not require_all and not isinstance(raw.get('id'), int):
+            errors.append(f"item {line}: missing id")
+            continue
+        
+        item, error = _parse_item(raw, require_all)
+        if error:
+            errors.append(f"item {line}: {error}")
+        else:
+            if not require_all:
+                item['id'] = raw['id']
+            items.append(item)
+    
+    return items, errors
+
 @inventory_bp.route('/')
 @login_required
 def index():
-    # Get all inventory items for the current user
-    inventory_items = Inventory.get_by_user_id(current_user.id)
-    
-    # Get items that are expiring soon
-    expiring_items = Inventory.get_expiring_items(
+    # Get all inventory items for the current user, with the expiring
+    # items and category groups worked out from the same query
+    snapshot = Inventory.get_snapshot(
         current_user.id, 
         Config.INVENTORY_EXPIRY_WARNING_DAYS
     )
@@ -27,8 +135,9 @@ def index():
     
     return render_template(
         'inventory/index.html', 
-        inventory_items=inventory_items,
-        expiring_items=expiring_items,
+        inventory_items=snapshot.items,
+        expiring_items=snapshot.expiring,
+        items_by_category=snapshot.by_category,
         categories=categories
     )
 
@@ -128,13 +237,94 @@ def ingredient_info():
     if not name:
         return jsonify({})
     
-    # Get suggested unit for ingredient
-    unit = Inventory.get_ingredient_unit(name)
+    # Get suggested unit and category for ingredient
+    return jsonify(Inventory.get_ingredient_info(name))
+
+@inventory_bp.route('/import', methods=['GET', 'POST'])
+@login_required
+def import_items():
+    """Add many ingredients at once from a JSON list or CSV"""
+    form = InventoryImportForm()
+    
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        rows = payload.get('items') if isinstance(payload, dict) else payload
+        
+        if not isinstance(rows, list):
+            return jsonify({'error': 'Expected a list of items'}), 400
+    elif request.method == 'POST':
+        if request.mimetype == 'text/csv':
+            text = request.get_data(as_text=True)
+        elif not form.validate_on_submit():
+            return render_template('inventory/import.html', form=form, title='Import Ingredients')
+        elif form.csv_file.data:
+            text = form.csv_file.data.read().decode('utf-8-sig')
+        else:
+            text = form.csv_text.data or ''
+        
+        # One row past the limit is enough to reject an oversized file
+        rows = list(itertools.islice(csv.DictReader(io.StringIO(text)), Config.INVENTORY_BATCH_MAX_ROWS + 1))
+    else:
+        return render_template('inventory/import.html', form=form, title='Import Ingredients')
+    
+    items, errors = _parse_items(rows)
+    
+    if errors:
+        if request.is_json or request.mimetype == 'text/csv':
+            return jsonify({'error': 'Invalid items', 'details': errors}), 400
+        
+        for error in errors[:10]:
+            flash(error, 'danger')
+        return render_template('inventory/import.html', form=form, title='Import Ingredients')
+    
+    started = time.perf_counter()
+    added = Inventory.add_items(current_user.id, items)
+    elapsed = time.perf_counter() - started
+    
+    if added is None:
+        if request.is_json or request.mimetype == 'text/csv':
+            return jsonify({'error': 'Error importing ingredients'}), 500
+        
+        flash('Error importing ingredients. Please try again.', 'danger')
+        return render_template('inventory/import.html', form=form, title='Import Ingredients')
+    
+    items_per_sec = round(added / elapsed, 1) if elapsed > 0 else None
+    logger.info(f"Imported {added} inventory items in {elapsed:.3f}s ({items_per_sec} items/sec)")
+    
+    if request.is_json or request.mimetype == 'text/csv':
+        return jsonify({
+            'added': added,
+            'seconds': round(elapsed, 4),
+            'items_per_sec': items_per_sec
+        })
+    
+    flash(f'Imported {added} ingredients ({items_per_sec} items/sec).', 'success')
+    return redirect(url_for('inventory.index'))
+
+@inventory_bp.route('/batch-edit', methods=['POST'])
+@login_required
+def batch_edit():
+    """Edit many ingredients at once from a JSON list of partial items with IDs"""
+    payload = request.get_json(silent=True)
+    rows = payload.get('items') if isinstance(payload, dict) else payload
+    
+    if not isinstance(rows, list):
+        return jsonify({'error': 'Expected a list of items'}), 400
+    
+    items, errors = _parse_items(rows, require_all=False)
+    
+    if errors:
+        return jsonify({'error': 'Invalid items', 'details': errors}), 400
+    
+    started = time.perf_counter()
+    changed = Inventory.update_items(current_user.id, items)
+    elapsed = time.perf_counter() - started
     
-    # Get suggested category for ingredient
-    category = Inventory.get_ingredient_category(name)
+    if changed is None:
+        return jsonify({'error': 'Error updating ingredients'}), 500
     
     return jsonify({
-        'unit': unit,
-        'category': category
+        'updated': changed,
+        'seconds': round(elapsed, 4),
+        'items_per_sec': round(len(items) / elapsed, 1) if elapsed > 0 else None
     })
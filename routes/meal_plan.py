@@ -1,6 +1,6 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
-from models.meal_plan import MealPlan
+from models.meal_plan import MealPlan, MealPlanNotFoundError, UnknownRecipesError
 from models.recipe import Recipe
 from models.inventory import Inventory
 from forms import MealPlanForm
@@ -12,6 +12,9 @@ logger = logging.getLogger(__name__)
 
 meal_plan_bp = Blueprint('meal_plan', __name__)
 
+VALID_DAYS = {day for day, _ in Config.DAYS_OF_WEEK}
+VALID_MEAL_TYPES = {meal_type for meal_type, _ in Config.MEAL_TYPES}
+
 @meal_plan_bp.route('/')
 @login_required
 def index():
@@ -39,18 +42,68 @@ def index():
         meal_types=meal_types
     )
 
+@meal_plan_bp.route('/history')
+@login_required
+def history():
+    # Keyset pagination: `before` and `before_id` are the week and ID of the
+    # last plan on the previous page
+    before = None
+    if 'before' in request.args or 'before_id' in request.args:
+        try:
+            before = (
+                datetime.strptime(request.args['before'], '%Y-%m-%d').date(),
+                int(request.args['before_id'])
+            )
+        except (KeyError, ValueError):
+            flash('Invalid page of meal plan history.', 'danger')
+            return redirect(url_for('meal_plan.history'))
+    
+    meal_plans, next_before = MealPlan.get_history(current_user.id, before)
+    
+    # Fix image URLs
+    for meal_plan in meal_plans:
+        for item in meal_plan.items:
+            if 'image_url' in item['recipe']:
+                item['recipe']['image_url'] = Recipe.get_image_path(
+                    str(item['recipe']['_id']), 
+                    item['recipe']['image_url']
+                )
+    
+    return render_template(
+        'meal_plan/history.html', 
+        meal_plans=meal_plans,
+        next_before=next_before,
+        is_first_page=before is None,
+        days=dict(Config.DAYS_OF_WEEK),
+        meal_types=dict(Config.MEAL_TYPES)
+    )
+
+@meal_plan_bp.route('/generate', methods=['POST'])
+@login_required
+def generate():
+    added = MealPlan.generate_week(current_user.id, current_user.get_preferences())
+    
+    if added is None:
+        flash('Error generating meal plan.', 'danger')
+    elif added:
+        flash(f'Added {added} recipes to your meal plan.', 'success')
+    else:
+        flash('Your meal plan is already full.', 'info')
+    
+    return redirect(url_for('meal_plan.index'))
+
 @meal_plan_bp.route('/add', methods=['POST'])
 @login_required
 def add():
     form = MealPlanForm()
     
     if form.validate_on_submit():
-        # Get current week's meal plan
-        meal_plan = MealPlan.get_current_week(current_user.id)
+        # Only the plan ID is needed, not its items and recipes
+        plan_id = MealPlan.get_current_week_id(current_user.id)
         
         # Add recipe to meal plan
-        item_id = MealPlan.add_recipe(
-            plan_id=meal_plan.id,
+        item_id = plan_id and MealPlan.add_recipe(
+            plan_id=plan_id,
             recipe_id=form.recipe_id.data,
             day_of_week=form.day_of_week.data,
             meal_type=form.meal_type.data
@@ -71,6 +124,111 @@ def add():
         return redirect(next_url)
     return redirect(url_for('meal_plan.index'))
 
+def _parse_operation(raw):
+    """
+    Validate one batch operation
+    
+    Returns:
+        tuple: (operation dictionary, error message or None)
+    """
+    if not isinstance(raw, dict):
+        return None, "expected an object"
+    
+    op = raw.get('op')
+    if op not in ('add', 'move', 'remove'):
+        return None, f"unknown op: {op}"
+    
+    operation = {'op': op}
+    
+    if op == 'add':
+        recipe_id = raw.get('recipe_id')
+        if not isinstance(recipe_id, str) or not recipe_id:
+            return None, "add needs a recipe_id"
+        operation['recipe_id'] = recipe_id
+    else:
+        try:
+            operation['item_id'] = int(raw.get('item_id'))
+        except (TypeError, ValueError):
+            return None, f"{op} needs an integer item_id"
+    
+    if op in ('add', 'move'):
+        try:
+            day_of_week = int(raw.get('day_of_week'))
+        except (TypeError, ValueError):
+            return None, f"{op} needs a day_of_week"
+        if day_of_week not in VALID_DAYS:
+            return None, f"invalid day_of_week: {day_of_week}"
+        
+        meal_type = raw.get('meal_type')
+        if meal_type not in VALID_MEAL_TYPES:
+            return None, f"invalid meal_type: {meal_type}"
+        
+        operation['day_of_week'] = day_of_week
+        operation['meal_type'] = meal_type
+    
+    return operation, None
+
+def _item_json(item):
+    return {
+        'id': item['id'],
+        'recipe_id': item['recipe_id'],
+        'day_of_week': item['day_of_week'],
+        'meal_type': item['meal_type'],
+        'recipe': {
+            'name': item['recipe'].get('name'),
+            'image_url': Recipe.get_image_path(item['recipe_id'], item['recipe'].get('image_url')),
+            'prep_time': item['recipe'].get('prep_time'),
+            'cook_time': item['recipe'].get('cook_time'),
+            'difficulty': item['recipe'].get('difficulty')
+        }
+    }
+
+@meal_plan_bp.route('/batch', methods=['POST'])
+@meal_plan_bp.route('/<int:plan_id>/batch', methods=['POST'])
+@login_required
+def batch(plan_id=None):
+    """Apply a JSON list of add/move/remove operations and return only what changed"""
+    payload = request.get_json(silent=True)
+    rows = payload.get('operations') if isinstance(payload, dict) else payload
+    
+    if not isinstance(rows, list):
+        return jsonify({'error': 'Expected a list of operations'}), 400
+    
+    operations = []
+    errors = []
+    for line, raw in enumerate(rows, start=1):
+        operation, error = _parse_operation(raw)
+        if error:
+            errors.append(f"operation {line}: {error}")
+        else:
+            operations.append(operation)
+    
+    if errors:
+        return jsonify({'error': 'Invalid operations', 'details': errors}), 400
+    
+    if plan_id is None:
+        plan_id = MealPlan.get_current_week_id(current_user.id)
+    
+    if plan_id is None:
+        return jsonify({'error': 'Meal plan could not be loaded'}), 500
+    
+    try:
+        changes = MealPlan.apply_operations(plan_id, current_user.id, operations)
+    except UnknownRecipesError as e:
+        return jsonify({'error': 'Unknown recipes', 'details': e.recipe_ids}), 400
+    except MealPlanNotFoundError:
+        return jsonify({'error': 'Meal plan not found'}), 404
+    
+    if changes is None:
+        return jsonify({'error': 'Meal plan could not be updated'}), 500
+    
+    return jsonify({
+        'plan_id': plan_id,
+        'added': [_item_json(item) for item in changes['added']],
+        'moved': [_item_json(item) for item in changes['moved']],
+        'removed': changes['removed']
+    })
+
 @meal_plan_bp.route('/remove/<int:item_id>', methods=['POST'])
 @login_required
 def remove(item_id):
@@ -82,6 +240,46 @@ def remove(item_id):
     
     return redirect(url_for('meal_plan.index'))
 
+@meal_plan_bp.route('/grocery-list/range')
+@login_required
+def grocery_list_range():
+    # Default to the four weeks starting this Monday
+    today = datetime.now().date()
+    start_of_week = today - timedelta(days=today.weekday())
+    
+    start = request.args.get('start')
+    end = request.args.get('end')
+    
+    try:
+        start_date = datetime.strptime(start, '%Y-%m-%d').date() if start else start_of_week
+        end_date = datetime.strptime(end, '%Y-%m-%d').date() if end else start_date + timedelta(days=27)
+    except ValueError:
+        flash('Dates must be in YYYY-MM-DD format.', 'danger')
+        return redirect(url_for('meal_plan.index'))
+    
+    if end_date < start_date:
+        flash('The end date must not be before the start date.', 'danger')
+        return redirect(url_for('meal_plan.index'))
+    
+    if (end_date - start_date).days >= Config.GROCERY_RANGE_MAX_DAYS:
+        end_date = start_date + timedelta(days=Config.GROCERY_RANGE_MAX_DAYS - 1)
+        flash(f'Grocery lists cover at most {Config.GROCERY_RANGE_MAX_DAYS} days.', 'info')
+    
+    grocery_list, meal_count = MealPlan.get_range_grocery_list(
+        current_user.id,
+        start_date,
+        end_date,
+        Inventory.get_pantry(current_user.id)
+    )
+    
+    return render_template(
+        'meal_plan/grocery_range.html', 
+        grocery_list=grocery_list,
+        meal_count=meal_count,
+        start_date=start_date,
+        end_date=end_date
+    )
+
 @meal_plan_bp.route('/grocery-list/<int:plan_id>')
 @login_required
 def grocery_list(plan_id):
@@ -93,10 +291,13 @@ def grocery_list(plan_id):
         return redirect(url_for('meal_plan.index'))
     
     # Get user's inventory
-    inventory_items = Inventory.get_by_user_id(current_user.id)
+    inventory_items = Inventory.get_pantry(current_user.id)
     
-    # Generate grocery list
-    grocery_list = meal_plan.get_grocery_list(inventory_items)
+    # Generate grocery list from the plan's materialized requirement
+    grocery_list = MealPlan.get_plan_grocery_list(plan_id, inventory_items)
+    if grocery_list is None:
+        flash('Error building grocery list. Please try again.', 'danger')
+        grocery_list = []
     
     # Fix image URLs
     for item in meal_plan.items:
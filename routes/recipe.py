@@ -7,25 +7,41 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+DIETARY_FILTERS = ['vegetarian', 'vegan', 'gluten_free', 'dairy_free']
+
 recipe_bp = Blueprint('recipe', __name__)
 
 @recipe_bp.route('/')
 @login_required
 def index():
-    # Get all recipes
-    recipes = Recipe.get_all()
-    
     # Get user's dietary preferences
     preferences = current_user.get_preferences()
+    dietary_filters = {
+        key: value for key, value in preferences.items()
+        if key in DIETARY_FILTERS and value
+    }
+    
+    # Get optional time and difficulty filters
+    max_time = request.args.get('max_time', type=int)
+    difficulty = request.args.get('difficulty') or None
+    after = request.args.get('after') or None
+    
+    # Get one page of recipes with all filters applied in MongoDB
+    recipes, next_after = Recipe.get_page(
+        dietary_filters=dietary_filters,
+        max_time=max_time,
+        difficulty=difficulty,
+        after=after
+    )
     
-    # Filter recipes based on preferences
-    if any(preferences.values()):
-        dietary_filters = {
-            key: value for key, value in preferences.items() if value
-        }
-        recipes = Recipe.filter_by_dietary(recipes, dietary_filters)
-    
-    return render_template('recipe/index.html', recipes=recipes)
+    return render_template(
+        'recipe/index.html',
+        recipes=recipes,
+        next_after=next_after,
+        max_time=max_time,
+        difficulty=difficulty,
+        is_first_page=after is None
+    )
 
 @recipe_bp.route('/<recipe_id>')
 @login_required
@@ -42,7 +58,7 @@ def detail(recipe_id):
         recipe['image_url'] = Recipe.get_image_path(recipe_id, recipe['image_url'])
     
     # Check if user has all ingredients in inventory
-    inventory_items = Inventory.get_by_user_id(current_user.id)
+    inventory_items = Inventory.get_pantry(current_user.id)
     
     # Create a dictionary of user's inventory for easy lookup
     user_inventory = {}
@@ -89,7 +105,7 @@ def search():
     
     # Apply dietary filters if provided
     dietary_filters = {}
-    for filter_name in ['vegetarian', 'vegan', 'gluten_free', 'dairy_free']:
+    for filter_name in DIETARY_FILTERS:
         if request.args.get(filter_name) == 'on':
             dietary_filters[filter_name] = True
     
@@ -103,6 +119,19 @@ def search():
     
     return render_template('recipe/search.html', recipes=recipes, search_term=search_term)
 
+@recipe_bp.route('/what-can-i-cook')
+@login_required
+def what_can_i_cook():
+    # Rank recipes by how much of each one the user's inventory covers
+    recipes = Recipe.what_can_i_cook(current_user.id)
+    
+    # Fix image URLs
+    for recipe in recipes:
+        if 'image_url' in recipe:
+            recipe['image_url'] = Recipe.get_image_path(str(recipe['_id']), recipe['image_url'])
+    
+    return render_template('recipe/cook.html', recipes=recipes)
+
 @recipe_bp.route('/completed')
 @login_required
 def completed():